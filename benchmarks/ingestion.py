@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import multiprocessing
+import resource
+import pyarrow as pa
+from src.utils.synthetic import write_synthetic_csv
+from src.ingestion.local_ingestion import ingest_local
+
+SELECTED_COLUMNS = [
+    "product_id", "product_category_name", "month_year", "year", "month", "qty", "unit_price",
+    "comp_1", "comp_2", "comp_3", "product_score", "volume", "lag_price"
+]
+
+def _run_local(csv_path: str, output_path: str) -> dict:
+    start = time.perf_counter()
+    rows = ingest_local(csv_path, output_path, SELECTED_COLUMNS)
+    elapsed = time.perf_counter() - start
+    return {
+        "engine": "local",
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed,
+        "peak_arrow_mb": pa.default_memory_pool().max_memory() / 2**20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+def bench_local(csv_path: str, output_path: str) -> dict:
+    """Run the local engine in a fresh process so peak RSS reflects ingestion alone."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_local, (csv_path, output_path))
+
+def bench_spark(csv_path: str, output_path: str) -> dict:
+    """Same work on a local SparkSession (inferSchema read + Parquet write), including startup."""
+    try:
+        from pyspark.sql import SparkSession
+    except ImportError:
+        return {"engine": "spark", "skipped": "pyspark not installed"}
+
+    start = time.perf_counter()
+    spark = SparkSession.builder.master("local[*]").appName("IngestionBenchmark").getOrCreate()
+    startup = time.perf_counter() - start
+    try:
+        data = spark.read.csv(csv_path, header=True, inferSchema=True).select(SELECTED_COLUMNS)
+        data.write.mode("overwrite").parquet(output_path)
+        rows = spark.read.parquet(output_path).count()
+    finally:
+        spark.stop()
+    elapsed = time.perf_counter() - start
+    return {"engine": "spark", "rows": rows, "seconds": elapsed, "startup_seconds": startup, "rows_per_sec": rows / elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the local streaming ingestion engine with Spark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--skip-spark", action="store_true")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="ingestion-bench-")
+    try:
+        for n_rows in args.rows:
+            csv_path = write_synthetic_csv(os.path.join(workdir, f"retail_{n_rows}.csv"), n_rows)
+            engines = [bench_local] if args.skip_spark else [bench_local, bench_spark]
+            for bench in engines:
+                result = dict(bench(csv_path, os.path.join(workdir, f"out_{bench.__name__}_{n_rows}")), input_rows=n_rows)
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
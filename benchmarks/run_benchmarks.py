@@ -0,0 +1,177 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+import numpy as np
+from src.utils.synthetic import synthetic_retail_data
+from benchmarks.stub_openai import StubOpenAIServer
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+SAMPLE_REQUEST = {
+    "product_id": "bench1",
+    "unit_price": 100.0,
+    "comp_1": 95.0,
+    "comp_2": 97.0,
+    "comp_3": 93.0,
+    "qty": 50,
+    "product_category_name": "bed_bath_table",
+    "product_score": 4.5,
+    "volume": 100.0,
+    "lag_price": 98.0
+}
+
+def _throughput(name: str, count: int, seconds: float, unit: str) -> dict:
+    return {name: {"value": count / seconds, "unit": unit, "higher_is_better": True}}
+
+def _latency(name: str, samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        f"{name}_p50_ms": {"value": statistics.median(samples) * 1000, "unit": "ms", "higher_is_better": False},
+        f"{name}_p99_ms": {"value": samples[int(0.99 * (len(samples) - 1))] * 1000, "unit": "ms", "higher_is_better": False}
+    }
+
+def bench_env(dataset, steps: int) -> dict:
+    """RetailPricingEnv reset/step and VecRetailPricingEnv step throughput."""
+    from src.model.pricing_model import RetailPricingEnv
+    from src.model.product_table import ProductTable
+    from src.model.vec_env import VecRetailPricingEnv
+
+    table = ProductTable.from_dataframe(dataset)
+    env = RetailPricingEnv(env_config={"product_table": table})
+    env.reset(seed=0)
+    action = np.array([0.01], dtype=np.float32)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.reset()
+    results = _throughput("env_reset_per_sec", steps, time.perf_counter() - start, "resets/s")
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(action)
+    results.update(_throughput("env_step_per_sec", steps, time.perf_counter() - start, "steps/s"))
+
+    vec_env = VecRetailPricingEnv(env_config={"product_table": table}, num_envs=64)
+    vec_env.reset()
+    actions = np.full((64, 1), 0.01, dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(steps // 64 or 1):
+        vec_env.step(actions)
+    results.update(_throughput("vec_env_step_per_sec", (steps // 64 or 1) * 64, time.perf_counter() - start, "steps/s"))
+    return results
+
+def bench_features(dataset, rows: int) -> dict:
+    """Feature computation per row, single-row path and column path."""
+    from src.preprocessing.features import compute_features, featurize_columns
+
+    records = dataset.head(rows).to_dict("records")
+    start = time.perf_counter()
+    for row in records:
+        compute_features(row["unit_price"], row["comp_1"], row["comp_2"], row["comp_3"], row["qty"], row["lag_price"], row["product_score"])
+    results = _throughput("features_row_per_sec", len(records), time.perf_counter() - start, "rows/s")
+
+    start = time.perf_counter()
+    featurize_columns(dataset)
+    results.update(_throughput("features_columns_per_sec", len(dataset), time.perf_counter() - start, "rows/s"))
+    return results
+
+async def _time_requests(client, path: str, requests: int) -> list:
+    samples = []
+    for i in range(requests):
+        body = dict(SAMPLE_REQUEST, product_id=f"bench{i}", unit_price=SAMPLE_REQUEST["unit_price"] + i)
+        start = time.perf_counter()
+        response = await client.post(path, json=body)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return samples
+
+async def bench_api(requests: int, stub_base_url: str) -> dict:
+    """Latency of /preprocess, /predict_price and /generate_insights through the ASGI apps in-process."""
+    import httpx
+    from src.preprocessing import preprocess as preprocess_module
+    from src.api import serve
+    from src.genai import insights
+    from src.genai.cache import InsightsCache
+
+    # Route insights to the stub server and bypass the cache so every call goes upstream
+    from openai import AsyncOpenAI
+    stub_client = AsyncOpenAI(api_key="stub", base_url=stub_base_url)
+    insights.get_async_client = lambda config_path: stub_client
+    insights.get_insights_cache = lambda config_path: InsightsCache(max_entries=0)
+
+    results = {}
+    transport = httpx.ASGITransport(app=preprocess_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results.update(_latency("preprocess", await _time_requests(client, "/preprocess", requests)))
+
+    async with serve.app.router.lifespan_context(serve.app):
+        transport = httpx.ASGITransport(app=serve.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results.update(_latency("predict_price", await _time_requests(client, "/predict_price", requests)))
+            results.update(_latency("generate_insights", await _time_requests(client, "/generate_insights", requests)))
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the metrics that regressed by more than tolerance relative to the baseline."""
+    regressions = []
+    for name, metric in results.items():
+        reference = baseline.get("metrics", {}).get(name)
+        if reference is None or not reference["value"]:
+            continue
+        change = (metric["value"] - reference["value"]) / reference["value"]
+        if (change < -tolerance) if metric["higher_is_better"] else (change > tolerance):
+            regressions.append({"metric": name, "baseline": reference["value"], "current": metric["value"], "change": change})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the pricing hot paths.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic dataset size")
+    parser.add_argument("--steps", type=int, default=20_000, help="Env steps/resets to time")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per API endpoint")
+    parser.add_argument("--output", default="bench_output.json", help="Where to write results")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    # Service modules read config/config.yaml relative to the project root
+    os.chdir(PROJECT_ROOT)
+    from src.utils.logger import setup_logger
+    setup_logger("config/config.yaml").setLevel(logging.WARNING)
+
+    dataset = synthetic_retail_data(args.rows)
+    metrics = {}
+    metrics.update(bench_env(dataset, args.steps))
+    metrics.update(bench_features(dataset, min(args.rows, args.steps)))
+    with StubOpenAIServer() as stub:
+        metrics.update(asyncio.run(bench_api(args.requests, stub.base_url)))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {"rows": args.rows, "steps": args.steps, "requests": args.requests},
+        "metrics": metrics
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    for name, metric in metrics.items():
+        print(f"{name:<32} {metric['value']:14.3f} {metric['unit']}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(metrics, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
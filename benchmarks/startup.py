@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import os
+import subprocess
+import time
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+def measure_imports(module: str) -> dict:
+    """Import module in a fresh interpreter with -X importtime and collect per-module cost."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+        capture_output=True,
+        text=True
+    )
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+
+    # Top-level packages pulled in, by cumulative cost
+    packages = {}
+    for entry in modules:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + entry["self_ms"]
+    return {
+        "module": module,
+        "wall_time_ms": wall_time * 1000,
+        "packages_ms": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+        "heavy_modules_loaded": sorted(name for name in ("torch", "transformers", "peft", "openai", "stable_baselines3") if name in packages)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import cost per module for service entry points.")
+    parser.add_argument("modules", nargs="*", default=["src.api.serve", "src.preprocessing.preprocess"])
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to report")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    reports = [measure_imports(module) for module in args.modules]
+    for report in reports:
+        print(f"{report['module']}: {report['wall_time_ms']:.0f} ms wall, heavy modules: {report['heavy_modules_loaded'] or 'none'}")
+        for package, cost in list(report["packages_ms"].items())[:args.top]:
+            print(f"  {package:<30} {cost:10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(reports, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import socket
+import threading
+import time
+from fastapi import FastAPI
+import uvicorn
+
+STUB_INSIGHTS = "Price is competitive for the category. Demand is steady. Quality perception supports a small increase."
+
+def create_stub_app(latency_s: float = 0.0) -> FastAPI:
+    """OpenAI-compatible /v1/chat/completions stub returning a fixed completion."""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        app.state.calls += 1
+        if latency_s:
+            await asyncio.sleep(latency_s)
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": STUB_INSIGHTS}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    return app
+
+class StubOpenAIServer:
+    """Run the stub on a free localhost port in a background thread."""
+    def __init__(self, latency_s: float = 0.0):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.app = create_stub_app(latency_s)
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self) -> "StubOpenAIServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
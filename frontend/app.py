@@ -2,8 +2,9 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import requests
+from requests.adapters import HTTPAdapter
 import yaml
 from src.utils.logger import setup_logger
 
@@ -13,6 +14,17 @@ logger = setup_logger("config/config.yaml")
 with open("config/config.yaml", "r") as file:
     config = yaml.safe_load(file)
 
+API_URL = f"http://{config['api']['host']}:{config['api']['port']}"
+# (connect, read) timeouts; the read timeout bounds the wait for insights
+TIMEOUT = (
+    config["frontend"].get("connect_timeout_seconds", 3.0),
+    config["frontend"].get("read_timeout_seconds", 60.0)
+)
+
+# One keep-alive connection pool shared by all page requests
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=config["frontend"].get("pool_size", 10)))
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
@@ -31,29 +43,41 @@ def index():
             }
             logger.info(f"Processing request for product: {data['product_id']}")
             
-            # Call APIs
-            price_response = requests.post(
-                f"http://{config['api']['host']}:{config['api']['port']}/predict_price",
-                json=data
-            ).json()
-            insights_response = requests.post(
-                f"http://{config['api']['host']}:{config['api']['port']}/generate_insights",
-                json=data
-            ).json()
-            
-            # Pass full response data to the template
-            return render_template(
-                "index.html",
-                result={
-                    "price_response": price_response,  # Full price response
-                    "insights": insights_response["insights"]  # Insights text
-                }
-            )
+            # The page streams price and insights for this request from /price_insights/stream
+            return render_template("index.html", result={"request": data})
         except Exception as e:
             logger.error(f"Frontend request failed: {str(e)}")
             return render_template("index.html", error=str(e))
     
     return render_template("index.html")
 
+@app.route("/price_insights/stream", methods=["POST"])
+def price_insights_stream():
+    """Relay the API's price and insights event stream to the browser as it arrives."""
+    try:
+        upstream = session.post(
+            f"{API_URL}/price_insights/stream", json=request.get_json(), stream=True, timeout=TIMEOUT
+        )
+    except requests.RequestException as e:
+        logger.error(f"Price and insights stream failed: {str(e)}")
+        return jsonify({"detail": str(e)}), 502
+    if not upstream.ok:
+        try:
+            detail = upstream.json().get("detail", f"Pricing API returned {upstream.status_code}")
+        except ValueError:
+            detail = f"Pricing API returned {upstream.status_code}"
+        upstream.close()
+        return jsonify({"detail": detail}), upstream.status_code
+
+    def relay():
+        try:
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        finally:
+            # Browser went away: dropping the API connection cancels the generation there
+            upstream.close()
+
+    return Response(relay(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 if __name__ == "__main__":
     app.run(host=config["frontend"]["host"], port=config["frontend"]["port"])
\ No newline at end of file
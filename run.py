@@ -2,6 +2,7 @@ import subprocess
 import os
 from pathlib import Path
 import sys
+import yaml
 from src.utils.logger import setup_logger
 
 def run_pipeline():
@@ -22,21 +23,31 @@ def run_pipeline():
         project_root / "src" / "ingestion" / "ingestion.py",
         project_root / "src" / "preprocessing" / "preprocess.py",
         project_root / "src" / "model" / "pricing_model.py",
+        project_root / "src" / "model" / "evaluate.py",
+        project_root / "src" / "model" / "reprice.py",
         project_root / "src" / "genai" / "insights.py",
         project_root / "src" / "api" / "serve.py",
         project_root / "frontend" / "app.py"
     ]
+    # Preprocessing, API, and frontend run as servers
+    servers = {scripts[1], scripts[6], scripts[7]}
+    
+    # Full-catalog repricing is an optional batch step
+    with open("config/config.yaml", "r") as file:
+        config = yaml.safe_load(file)
+    if not config.get("reprice", {}).get("enabled", False):
+        scripts.remove(project_root / "src" / "model" / "reprice.py")
     
     try:
-        for i, script in enumerate(scripts):
+        for script in scripts:
             if not script.exists():
                 logger.error(f"Script not found: {script}")
                 raise FileNotFoundError(f"Script not found: {script}")
             
             logger.info(f"Executing script: {script}")
-            if i in [1, 4, 5]:  # Preprocessing, API, and frontend run as servers
+            if script in servers:
                 subprocess.Popen(["python", str(script)])
-            else:  # Ingestion, model, and GenAI run once
+            else:  # Ingestion, model, evaluation, repricing and GenAI run once
                 subprocess.run(["python", str(script)], check=True)
     
     except Exception as e:
@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import json
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from src.preprocessing.features import INPUT_COLUMNS, FEATURE_NAMES
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# PricingRequest fields needed to score a batch
+NUMERIC_FIELDS = INPUT_COLUMNS
+STRING_FIELDS = ["product_id", "product_category_name"]
+
+def parse_batch(body: bytes, content_type: str):
+    """Decode a batch body into columns; returns (columns, layout)."""
+    if content_type.startswith(ARROW_STREAM):
+        import pyarrow as pa
+        try:
+            table = pa.ipc.open_stream(body).read_all()
+        except pa.ArrowException as e:
+            raise HTTPException(status_code=400, detail=f"Invalid Arrow IPC stream: {str(e)}")
+        raw = {name: table.column(name) for name in table.column_names}
+        layout = "arrow"
+    else:
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        if isinstance(payload, list):
+            try:
+                raw = {name: [item[name] for item in payload] for name in NUMERIC_FIELDS + STRING_FIELDS}
+            except (KeyError, TypeError) as e:
+                raise HTTPException(status_code=422, detail=f"Missing field in batch item: {str(e)}")
+            layout = "records"
+        elif isinstance(payload, dict):
+            raw = payload
+            layout = "columns"
+        else:
+            raise HTTPException(status_code=422, detail="Batch body must be a JSON list or an object of columns")
+
+    missing = [name for name in NUMERIC_FIELDS + STRING_FIELDS if name not in raw]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing columns: {missing}")
+
+    columns = {}
+    try:
+        for name in NUMERIC_FIELDS:
+            columns[name] = np.asarray(raw[name], dtype=np.float64)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid numeric column {name}: {str(e)}")
+    # Nulls decode to NaN; neither can be scored or encoded as JSON
+    non_finite = [name for name in NUMERIC_FIELDS if not np.isfinite(columns[name]).all()]
+    if non_finite:
+        raise HTTPException(status_code=422, detail=f"Missing or non-finite values in columns: {non_finite}")
+    for name in STRING_FIELDS:
+        values = raw[name]
+        columns[name] = values.to_pylist() if hasattr(values, "to_pylist") else [str(v) for v in values]
+
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise HTTPException(status_code=422, detail="All batch columns must have the same length")
+    if lengths == {0}:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    return columns, layout
+
+def encode_batch(result: dict, layout: str) -> Response:
+    """Encode batch results in the same layout as the request."""
+    if layout == "arrow":
+        import pyarrow as pa
+        table = pa.table(result)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
+    lists = {name: values.tolist() if isinstance(values, np.ndarray) else values for name, values in result.items()}
+    if layout == "columns":
+        return JSONResponse(lists)
+
+    records = [
+        {
+            "product_id": product_id,
+            "recommended_price": price,
+            "price_adjustment": adjustment,
+            "features": dict(zip(FEATURE_NAMES, feature_values), product_id=product_id, product_category_name=category)
+        }
+        for product_id, price, adjustment, category, *feature_values in zip(
+            lists["product_id"], lists["recommended_price"], lists["price_adjustment"],
+            lists["product_category_name"], *(lists[name] for name in FEATURE_NAMES)
+        )
+    ]
+    return JSONResponse(records)
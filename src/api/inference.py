@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import numpy as np
+from src.model.numpy_policy import NumpyPolicy
+
+def load_policy(model_path: str):
+    """Load the trained PPO policy on CPU for inference.
+
+    An exported .npz policy runs in NumPy without importing torch;
+    anything else is loaded through stable_baselines3.
+    """
+    if model_path.endswith(".npz"):
+        return NumpyPolicy.load(model_path)
+    from stable_baselines3 import PPO
+    # Training-only schedules are not needed to run the policy
+    custom_objects = {"lr_schedule": lambda _: 0.0, "clip_range": lambda _: 0.0}
+    return PPO.load(model_path, device="cpu", custom_objects=custom_objects)
+
+class PolicyBatcher:
+    """Coalesce concurrent price predictions into one batched policy forward pass."""
+    def __init__(self, model, max_batch_size: int = 64, batch_window_ms: float = 2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000.0
+        self._queue = None
+        self._worker = None
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        """Run the policy on an (N, 5) observation batch and return N price adjustments."""
+        actions, _ = self.model.predict(observations, deterministic=True)
+        return np.asarray(actions, dtype=np.float32).reshape(len(observations))
+
+    async def predict(self, observation: np.ndarray) -> float:
+        """Queue one observation and wait for its price adjustment."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((observation, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect requests for up to batch_window seconds, then score them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(items) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                adjustments = self.predict_batch(np.stack([obs for obs, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), adjustment in zip(items, adjustments):
+                if not future.done():
+                    future.set_result(float(adjustment))
+
+    async def close(self) -> None:
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
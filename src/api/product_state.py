@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from src.model.product_table import latest_rows
+
+# Per-product fields a request may omit; values come from the latest ingested row
+NUMERIC_STATE_FIELDS = ["unit_price", "comp_1", "comp_2", "comp_3", "qty", "product_score", "volume", "lag_price"]
+STATE_COLUMNS = ["product_id", "product_category_name", "month_year"] + NUMERIC_STATE_FIELDS
+
+# Snapshots are written to versioned subdirectories; this file names the current one
+CURRENT_FILE = "CURRENT"
+# Superseded versions kept so a reader that resolved the pointer just before a swap can still load
+KEEP_VERSIONS = 2
+
+def build_snapshot(dataset: pd.DataFrame, path: str) -> int:
+    """Write the latest row of every product as a memory-mappable snapshot version; returns the product count."""
+    latest = latest_rows(dataset)
+    # Sorted ids let lookups binary-search the mapped array without building a dict
+    latest = latest.sort_values("product_id", kind="stable")
+
+    categories, category_codes = np.unique(latest["product_category_name"].astype(str).to_numpy(), return_inverse=True)
+    version = f"v{time.time_ns()}"
+    version_path = os.path.join(path, version)
+    os.makedirs(version_path)
+    np.save(os.path.join(version_path, "product_ids.npy"), latest["product_id"].astype(str).to_numpy().astype(str))
+    np.save(os.path.join(version_path, "values.npy"), latest[NUMERIC_STATE_FIELDS].to_numpy(dtype=np.float64))
+    np.save(os.path.join(version_path, "category_codes.npy"), category_codes.astype(np.int32))
+    with open(os.path.join(version_path, "meta.json"), "w") as file:
+        json.dump({"fields": NUMERIC_STATE_FIELDS, "categories": categories.tolist()}, file)
+
+    # Swapping the pointer publishes the complete version in one step
+    temp_file = os.path.join(path, f"{CURRENT_FILE}.tmp")
+    with open(temp_file, "w") as file:
+        file.write(version)
+    os.replace(temp_file, os.path.join(path, CURRENT_FILE))
+
+    # Open mappings of removed versions stay valid
+    versions = sorted(name for name in os.listdir(path) if name.startswith("v") and name != version)
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    return len(latest)
+
+def current_snapshot(path: str) -> str:
+    """Resolve the directory of the current snapshot version."""
+    with open(os.path.join(path, CURRENT_FILE), "r") as file:
+        return os.path.join(path, file.read().strip())
+
+class ProductStateIndex:
+    """Read-only per-product state backed by memory-mapped arrays."""
+    def __init__(self, path: str):
+        # Every array comes from the one version the pointer named when loading started
+        path = current_snapshot(path)
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as file:
+            meta = json.load(file)
+        self.fields = meta["fields"]
+        self.categories = meta["categories"]
+        self.product_ids = np.load(os.path.join(path, "product_ids.npy"), mmap_mode="r")
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+        self.category_codes = np.load(os.path.join(path, "category_codes.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def lookup(self, product_id: str):
+        """Return the product's latest state as a dict, or None if it is unknown."""
+        position = int(np.searchsorted(self.product_ids, product_id))
+        if position == len(self.product_ids) or self.product_ids[position] != product_id:
+            return None
+        state = dict(zip(self.fields, self.values[position].tolist()))
+        state["qty"] = int(state["qty"])
+        state["product_category_name"] = self.categories[self.category_codes[position]]
+        return state
+
+class ProductStateStore:
+    """Holds the current ProductStateIndex and swaps in a reloaded one atomically."""
+    def __init__(self, path: str):
+        self.path = path
+        self.index = None
+
+    def reload(self) -> int:
+        """Map the snapshot at path; requests keep using the previous index until the swap."""
+        index = ProductStateIndex(self.path)
+        self.index = index
+        return len(index)
+
+    def lookup(self, product_id: str):
+        index = self.index
+        return index.lookup(product_id) if index is not None else None
+
+def build_product_state(config_path: str) -> int:
+    """Build the API's product state snapshot from the processed dataset."""
+    from src.model.pricing_model import load_dataset
+    from src.utils.logger import setup_logger
+    logger = setup_logger(config_path)
+
+    with open(config_path, "r") as file:
+        config = yaml.safe_load(file)
+    path = config["api"].get("product_state_path", "data/product_state")
+
+    dataset = load_dataset(config_path, columns=STATE_COLUMNS)
+    count = build_snapshot(dataset, path)
+    logger.info(f"Wrote product state snapshot for {count} products to {path}")
+    return count
+
+if __name__ == "__main__":
+    build_product_state("config/config.yaml")
@@ -2,27 +2,76 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import yaml
 from src.preprocessing.preprocess import preprocess
-from src.genai.insights import generate_insights
+from src.genai.insights import generate_insights_async, generate_insights_stream
+from src.genai.gateway import UpstreamOverloaded
+from src.api.inference import PolicyBatcher, load_policy
+from src.api.batch import parse_batch, encode_batch
+from src.model.elasticity import ElasticityEngine
+from src.api.product_state import NUMERIC_STATE_FIELDS, ProductStateStore
+from src.preprocessing.features import build_observation, featurize_columns, feature_matrix
 from src.utils.logger import setup_logger
+from src.utils.metrics import ERRORS, MetricsMiddleware, STAGES, metrics_response, observe_validation
 
-app = FastAPI()
 logger = setup_logger("config/config.yaml")
 
+with open("config/config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the PPO policy once at startup and keep it resident."""
+    model_path = config.get("model", {}).get("path", "models/ppo_policy.npz")
+    logger.info(f"Loading PPO policy from {model_path}")
+    app.state.policy = PolicyBatcher(
+        load_policy(model_path),
+        max_batch_size=config["api"].get("max_batch_size", 64),
+        batch_window_ms=config["api"].get("batch_window_ms", 2.0)
+    )
+    logger.info("PPO policy loaded")
+    # The elasticity engine is optional; requests for it get a 503 until an index is fitted
+    try:
+        app.state.elasticity = ElasticityEngine.from_config(config)
+        logger.info("Elasticity index loaded")
+    except FileNotFoundError as e:
+        app.state.elasticity = None
+        logger.warning(f"Elasticity engine unavailable: {str(e)}")
+    # Latest per-product state, so requests can send just product_id
+    app.state.product_state = ProductStateStore(config["api"].get("product_state_path", "data/product_state"))
+    try:
+        count = app.state.product_state.reload()
+        logger.info(f"Product state loaded for {count} products")
+    except FileNotFoundError as e:
+        logger.warning(f"Product state unavailable; requests must carry all fields: {str(e)}")
+    yield
+    await app.state.policy.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
 class PricingRequest(BaseModel):
     product_id: str
-    unit_price: float
-    comp_1: float
-    comp_2: float
-    comp_3: float
-    qty: int
-    product_category_name: str
-    product_score: float
-    volume: float
-    lag_price: float
+    # Omitted fields are filled from the product state index
+    unit_price: Optional[float] = None
+    comp_1: Optional[float] = None
+    comp_2: Optional[float] = None
+    comp_3: Optional[float] = None
+    qty: Optional[int] = None
+    product_category_name: Optional[str] = None
+    product_score: Optional[float] = None
+    volume: Optional[float] = None
+    lag_price: Optional[float] = None
+    engine: Literal["rl", "elasticity"] = "rl"  # Pricing engine to use
 
     # Add Pydantic configuration to coerce types
     class Config:
@@ -38,43 +87,226 @@ async def root():
     """Root endpoint."""
     return {"message": "Welcome to the Dynamic Pricing API. Use /docs to test the endpoints."}
 
+STATE_FIELDS = NUMERIC_STATE_FIELDS + ["product_category_name"]
+
+def resolve_request(request: PricingRequest) -> PricingRequest:
+    """Fill omitted fields from the product state index; explicit values act as overrides."""
+    missing = [name for name in STATE_FIELDS if getattr(request, name) is None]
+    if not missing:
+        return request
+    state = app.state.product_state.lookup(request.product_id)
+    if state is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No stored state for product {request.product_id}; send fields {missing}"
+        )
+    return request.model_copy(update={name: state[name] for name in missing})
+
+def check_engine(engine: str) -> None:
+    """Reject requests for an engine that is not loaded."""
+    if engine == "elasticity" and app.state.elasticity is None:
+        raise HTTPException(status_code=503, detail="Elasticity engine unavailable: no fitted index loaded")
+
+async def recommend_price(request: PricingRequest, features: dict) -> dict:
+    """Price one product with the requested engine (RL policy calls are batched across requests)."""
+    result = {"product_id": request.product_id, "engine": request.engine}
+    with STAGES["inference"].time():
+        if request.engine == "elasticity":
+            recommendation = app.state.elasticity.recommend({
+                "product_id": [request.product_id],
+                "product_category_name": [request.product_category_name],
+                "unit_price": [request.unit_price],
+                "qty": [request.qty]
+            })
+            price_adjustment = float(recommendation["price_adjustment"][0])
+            result["elasticity"] = float(recommendation["elasticity"][0])
+        else:
+            price_adjustment = await app.state.policy.predict(build_observation(features))
+    result.update({
+        "recommended_price": request.unit_price * (1 + price_adjustment),
+        "price_adjustment": price_adjustment,
+        "features": features
+    })
+    return result
+
 @app.post("/predict_price")
 async def predict_price(request: PricingRequest):
     """Predict optimal price."""
-    # Log the incoming request for debugging
-    logger.info(f"Received request: {request.dict()}")
-    logger.info(f"Predicting price for product: {request.product_id}")
+    observe_validation()
+    # Log the incoming request for debugging (only dumped when DEBUG is enabled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received request: %s", request.dict())
+    logger.info("Predicting price for product: %s", request.product_id)
+    check_engine(request.engine)
+    request = resolve_request(request)
     try:
         # Preprocess data
         features = await preprocess(request)
-        
-        # Placeholder: Call SAC model (replace with actual PPO model logic if needed)
-        recommended_price = request.unit_price * 1.1  # Dummy logic
+        result = await recommend_price(request, features)
         logger.info("Price prediction completed")
-        return {
-            "product_id": request.product_id,
-            "recommended_price": recommended_price,
-            "features": features
-        }
+        return result
     except Exception as e:
         logger.error(f"Price prediction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Price prediction failed: {str(e)}")
 
+def score_batch(body: bytes, content_type: str, engine: str) -> Response:
+    """Decode, score and encode one batch request body."""
+    with STAGES["validation"].time():
+        columns, layout = parse_batch(body, content_type)
+    logger.info("Predicting prices for batch of %d products (%s, %s engine)", len(columns["product_id"]), layout, engine)
+    try:
+        with STAGES["features"].time():
+            features = featurize_columns(columns)
+        extra = {}
+        with STAGES["inference"].time():
+            if engine == "elasticity":
+                recommendation = app.state.elasticity.recommend(columns)
+                price_adjustment = recommendation["price_adjustment"]
+                extra["elasticity"] = recommendation["elasticity"]
+            else:
+                price_adjustment = app.state.policy.predict_batch(feature_matrix(features)).astype(np.float64)
+        recommended_price = columns["unit_price"] * (1 + price_adjustment)
+        logger.info("Batch price prediction completed")
+        return encode_batch({
+            "product_id": columns["product_id"],
+            "recommended_price": recommended_price,
+            "price_adjustment": price_adjustment,
+            "product_category_name": columns["product_category_name"],
+            **extra,
+            **features
+        }, layout)
+    except Exception as e:
+        logger.error(f"Batch price prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch price prediction failed: {str(e)}")
+
+@app.post("/predict_price/batch")
+async def predict_price_batch(request: Request, engine: Literal["rl", "elasticity"] = "rl"):
+    """Predict optimal prices for many products (JSON list, JSON columns or Arrow IPC)."""
+    check_engine(engine)
+    body = await request.body()
+    # A large batch would otherwise block every other request on the event loop
+    return await asyncio.to_thread(score_batch, body, request.headers.get("content-type", ""), engine)
+
 @app.post("/generate_insights")
 async def generate_insights_endpoint(request: PricingRequest):
     """Generate market insights."""
-    logger.info(f"Generating insights for product: {request.product_id}")
+    observe_validation()
+    logger.info("Generating insights for product: %s", request.product_id)
+    request = resolve_request(request)
     try:
         features = await preprocess(request)
-        insights = generate_insights(features, "config/config.yaml")
+        insights = await generate_insights_async(features, "config/config.yaml")
         logger.info("Insights generation completed")
         return {"product_id": request.product_id, "insights": insights}
+    except UpstreamOverloaded as e:
+        logger.warning(f"Insights generation rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Insights service overloaded: {str(e)}")
+    except asyncio.TimeoutError:
+        logger.error("Insights generation timed out")
+        raise HTTPException(status_code=504, detail="Insights generation timed out")
     except Exception as e:
         logger.error(f"Insights generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Insights generation failed: {str(e)}")
 
+def sse_event(data: dict, event: str = None) -> str:
+    """Format one server-sent event."""
+    return (f"event: {event}\n" if event else "") + f"data: {json.dumps(data)}\n\n"
+
+async def insights_events(features: dict, product_id: str, endpoint: str):
+    """Yield insights text as "data" events, ending with a "done" event or an "error" event.
+
+    Closing the generator (client disconnect) cancels the upstream generation.
+    """
+    chunks = generate_insights_stream(features, "config/config.yaml")
+    error = None
+    try:
+        async for text in chunks:
+            yield sse_event({"text": text})
+        logger.info("Insights streaming completed")
+    except UpstreamOverloaded as e:
+        logger.warning(f"Insights generation rejected: {str(e)}")
+        error = {"status": 503, "detail": f"Insights service overloaded: {str(e)}"}
+    except asyncio.TimeoutError:
+        logger.error("Insights generation timed out")
+        error = {"status": 504, "detail": "Insights generation timed out"}
+    except Exception as e:
+        logger.error(f"Insights generation failed: {str(e)}")
+        error = {"status": 500, "detail": f"Insights generation failed: {str(e)}"}
+    finally:
+        # Runs on disconnect too, closing the upstream completion
+        await chunks.aclose()
+    if error is not None:
+        # The response status is already 200; count the failure here
+        ERRORS.labels(endpoint, str(error["status"])).inc()
+        yield sse_event(error, event="error")
+    else:
+        yield sse_event({"product_id": product_id}, event="done")
+
+@app.post("/generate_insights/stream")
+async def generate_insights_stream_endpoint(request: PricingRequest):
+    """Stream market insights as server-sent events while they are generated.
+
+    Each text chunk is a "data" event; the stream ends with a "done" event or an
+    "error" event. A client disconnect cancels the upstream generation.
+    """
+    observe_validation()
+    logger.info("Streaming insights for product: %s", request.product_id)
+    request = resolve_request(request)
+    try:
+        features = await preprocess(request)
+    except Exception as e:
+        logger.error(f"Preprocessing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Preprocessing failed: {str(e)}")
+
+    return StreamingResponse(
+        insights_events(features, request.product_id, "/generate_insights/stream"),
+        media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/price_insights/stream")
+async def price_insights_stream(request: PricingRequest):
+    """Price and streamed insights for one product from a single featurization, as server-sent events.
+
+    A "price" event carries the recommendation; the insights events of
+    /generate_insights/stream follow.
+    """
+    observe_validation()
+    logger.info("Streaming price and insights for product: %s", request.product_id)
+    check_engine(request.engine)
+    request = resolve_request(request)
+    try:
+        features = await preprocess(request)
+        price = await recommend_price(request, features)
+    except Exception as e:
+        logger.error(f"Price prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Price prediction failed: {str(e)}")
+
+    async def stream():
+        yield sse_event(price, event="price")
+        events = insights_events(features, request.product_id, "/price_insights/stream")
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/product_state/reload")
+async def reload_product_state():
+    """Swap in the latest product state snapshot without restarting."""
+    try:
+        count = app.state.product_state.reload()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Product state snapshot not found: {str(e)}")
+    logger.info(f"Product state reloaded for {count} products")
+    return {"products": count}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    return metrics_response()
+
 if __name__ == "__main__":
     import uvicorn
-    with open("config/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
     uvicorn.run(app, host=config["api"]["host"], port=config["api"]["port"])
\ No newline at end of file
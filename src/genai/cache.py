@@ -0,0 +1,134 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Default quantization bucket width per feature
+DEFAULT_BUCKETS = {"price_gap": 5.0, "demand_signal": 0.01, "product_score": 0.5}
+
+class InsightsCache:
+    """Bounded TTL + LRU cache for generated insights, optionally backed by SQLite on disk.
+
+    namespace (e.g. the backend and model) prefixes every key, so insights generated by one
+    model are never served after switching to another.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, buckets: dict = None, path: str = None,
+                 max_disk_entries: int = 100000, namespace: str = ""):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.buckets = {**DEFAULT_BUCKETS, **(buckets or {})}
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS insights (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS insights_expires_at ON insights (expires_at)")
+            self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: dict, namespace: str = "") -> "InsightsCache":
+        """Build the cache from the genai.cache section of config.yaml."""
+        cache_config = config.get("genai", {}).get("cache", {})
+        return cls(
+            max_entries=cache_config.get("max_entries", 1024),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600.0),
+            buckets=cache_config.get("buckets"),
+            path=cache_config.get("path"),
+            max_disk_entries=cache_config.get("max_disk_entries", 100000),
+            namespace=namespace
+        )
+
+    def make_key(self, data: dict) -> str:
+        """Key on namespace, category, pricing direction and the quantization bucket of each feature."""
+        # The prompt says whether the price is above or below competitors, so that is never shared
+        parts = [self.namespace, str(data["product_category_name"]), "above" if data["price_gap"] > 0 else "below"]
+        for name, width in self.buckets.items():
+            parts.append(f"{name}={math.floor(data[name] / width)}")
+        return "|".join(parts)
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on miss or expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM insights WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key with the configured TTL."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO insights (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                # Drop expired rows, then the oldest beyond max_disk_entries
+                self._db.execute("DELETE FROM insights WHERE expires_at <= ?", (time.time(),))
+                self._db.execute(
+                    "DELETE FROM insights WHERE key IN "
+                    "(SELECT key FROM insights ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+
+    async def get_async(self, key: str):
+        """get() for the event loop; SQLite reads run in a worker thread."""
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: str) -> None:
+        """set() for the event loop; SQLite writes run in a worker thread."""
+        if self._db is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def _store(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries)
+        }
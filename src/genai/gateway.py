@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+from contextlib import asynccontextmanager
+
+class UpstreamOverloaded(Exception):
+    """Raised when too many insight requests are already waiting for an upstream slot."""
+
+class _InflightCall:
+    """An upstream call shared by every caller waiting on the same key."""
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        # Callers may all have gone away; don't warn about an unretrieved exception
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+class InsightsGateway:
+    """Limit concurrent upstream LLM calls, shed load on deep queues and share identical in-flight calls."""
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64, timeout_seconds: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.waiting = 0
+        self._semaphore = None
+        self._inflight = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "InsightsGateway":
+        """Build the gateway from the genai section of config.yaml."""
+        genai_config = config.get("genai", {})
+        return cls(
+            max_concurrency=genai_config.get("max_concurrency", 8),
+            max_queue=genai_config.get("max_queue", 64),
+            timeout_seconds=genai_config.get("timeout_seconds", 30.0)
+        )
+
+    async def call(self, key: str, make_call):
+        """Run make_call() under the concurrency limit, sharing the result with identical in-flight keys.
+
+        The upstream call runs in a task owned by the gateway rather than by the first caller, so
+        one caller going away doesn't cancel it for the others; it is cancelled once none are left.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = _InflightCall(asyncio.create_task(self._run(make_call)))
+            self._inflight[key] = inflight
+
+            def forget(_):
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+            inflight.task.add_done_callback(forget)
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if inflight.waiters == 0 and not inflight.task.done():
+                inflight.task.cancel()
+
+    async def _run(self, make_call):
+        async with self.slot():
+            return await asyncio.wait_for(make_call(), self.timeout_seconds)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one upstream slot, shedding load when too many callers are already waiting."""
+        if self.waiting >= self.max_queue:
+            raise UpstreamOverloaded(f"{self.waiting} insight requests already queued")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
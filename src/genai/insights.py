@@ -2,43 +2,112 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
  
+import asyncio
 import os
+import threading
+from collections.abc import AsyncGenerator
+from functools import lru_cache
 from dotenv import load_dotenv
-from openai import OpenAI
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from peft import LoraConfig, get_peft_model
 import yaml
 from src.utils.logger import setup_logger
+from src.genai.cache import InsightsCache
+from src.genai.gateway import InsightsGateway
+from src.utils.metrics import STAGES, register_insights_cache
 
-# Clear existing OPENAI_API_KEY and HUGGINGFACE_TOKEN to avoid overrides
-if "OPENAI_API_KEY" in os.environ:
-    del os.environ["OPENAI_API_KEY"]
-    print("Cleared existing OPENAI_API_KEY")
-if "HUGGINGFACE_TOKEN" in os.environ:
-    del os.environ["HUGGINGFACE_TOKEN"]
-    print("Cleared existing HUGGINGFACE_TOKEN")
-
-# Load environment variables from .env file
-env_path = os.path.join(os.getcwd(), ".env")
-dotenv_loaded = load_dotenv(dotenv_path=env_path, verbose=True)
-print(f".env file loaded successfully: {dotenv_loaded}")
-print(f".env file exists: {os.path.exists(env_path)}")
-
-# Debugging: list all environment variables containing 'OPENAI' or 'HUGGINGFACE'
-print("All relevant environment variables:")
-for k, v in os.environ.items():
-    if "OPENAI" in k or "HUGGINGFACE" in k:
-        print(f"{k} = {v[:20]}...")
-
-# Initialize OpenAI client with API key
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env file")
-print(f"Loaded OpenAI API Key: {api_key[:20]}...")
-client = OpenAI(api_key=api_key)
+# Load environment variables from .env file (.env values take precedence).
+# openai, transformers and peft are imported on first use so that serving
+# workers start without loading torch or the HuggingFace stack.
+load_dotenv(dotenv_path=os.path.join(os.getcwd(), ".env"), override=True)
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env file")
+    return api_key
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Return the OpenAI client, created on first use."""
+    from openai import OpenAI
+    return OpenAI(api_key=_get_api_key())
+
+SYSTEM_PROMPT = "You are a market analyst providing pricing and demand insights."
+# Fixed opening of every insights prompt (the local backend caches its KV state)
+PROMPT_PREFIX = "Generate market insights for a product in the"
+OPENAI_MODEL = "gpt-4"
+
+@lru_cache(maxsize=None)
+def _load_config(config_path: str) -> dict:
+    with open(config_path, "r") as file:
+        return yaml.safe_load(file)
+
+@lru_cache(maxsize=None)
+def get_insights_cache(config_path: str) -> InsightsCache:
+    """Return the process-wide insights cache."""
+    cache = InsightsCache.from_config(_load_config(config_path), namespace=backend_name(config_path))
+    register_insights_cache(cache)
+    return cache
+
+@lru_cache(maxsize=None)
+def get_insights_gateway(config_path: str) -> InsightsGateway:
+    """Return the process-wide limiter for upstream insight calls."""
+    return InsightsGateway.from_config(_load_config(config_path))
+
+@lru_cache(maxsize=None)
+def get_async_client(config_path: str):
+    """Return the async OpenAI client (genai.base_url points it at a stub server in tests)."""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=_get_api_key(), base_url=_load_config(config_path).get("genai", {}).get("base_url"))
+
+@lru_cache(maxsize=None)
+def get_local_backend(config_path: str):
+    """Return the local quantized LLM batcher (genai.backend: local), loaded on first use."""
+    from src.genai.local_backend import LocalInsightsBatcher, LocalInsightsModel
+    config = _load_config(config_path)
+    local_config = config.get("genai", {}).get("local", {})
+    return LocalInsightsBatcher(
+        LocalInsightsModel.from_config(config, SYSTEM_PROMPT, PROMPT_PREFIX),
+        max_batch_size=local_config.get("max_batch_size", 8),
+        batch_window_ms=local_config.get("batch_window_ms", 10.0)
+    )
+
+def use_local_backend(config_path: str) -> bool:
+    return _load_config(config_path).get("genai", {}).get("backend", "openai") == "local"
+
+def backend_name(config_path: str) -> str:
+    """Backend and model that generate insights, e.g. "openai:gpt-4"."""
+    if use_local_backend(config_path):
+        return f"local:{_load_config(config_path)['genai']['model_name']}"
+    return f"openai:{OPENAI_MODEL}"
+
+def build_prompt(data: dict) -> str:
+    """Craft the market insights prompt for one product's features."""
+    price_gap = data["price_gap"]
+    return (
+        f"{PROMPT_PREFIX} {data['product_category_name']} category. "
+        f"The product's price is ${price_gap:.2f} {'above' if price_gap > 0 else 'below'} the average competitor price. "
+        f"Demand signal is {data['demand_signal']:.3f} (normalized qty, max 1.0). "
+        f"Product score is {data['product_score']:.1f} out of 5. "
+        f"Provide detailed insights in 5-6 lines, focusing on pricing strategy, demand trends, and quality perception."
+    )
+
+def chat_request(prompt: str) -> dict:
+    """Chat completion arguments shared by the sync and async paths."""
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 150,  # Enough for 5-6 lines
+        "temperature": 0.7  # Balanced creativity
+    }
 
 def fine_tune_genai(config_path: str) -> None:
     """Fine-tune model for market insights."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from peft import LoraConfig, get_peft_model
+    
     logger = setup_logger(config_path)
     logger.info("Starting GenAI fine-tuning")
     
@@ -87,7 +156,11 @@ def fine_tune_genai(config_path: str) -> None:
         logger.info("LoRA configuration applied successfully")
         
         # Placeholder: Add fine-tuning logic
-        logger.info("GenAI fine-tuning completed successfully")
+        
+        # Save the adapter so the local insights backend can serve it
+        adapter_path = config["genai"].get("adapter_path", "models/insights_lora")
+        model.save_pretrained(adapter_path)
+        logger.info(f"GenAI fine-tuning completed successfully; adapter saved to {adapter_path}")
     
     except Exception as e:
         logger.error(f"Fine-tuning failed: {str(e)}")
@@ -96,42 +169,138 @@ def fine_tune_genai(config_path: str) -> None:
 def generate_insights(data: dict, config_path: str) -> str:
     """Generate detailed market insights in 5-6 lines using OpenAI API."""
     logger = setup_logger(config_path)
-    logger.debug("Debug: Logger initialized for generate_insights")
-    logger.info(f"Generating insights for product: {data['product_id']}")
+    logger.info("Generating insights for product: %s", data["product_id"])
     
-    # Extract features for analysis
-    price_gap = data["price_gap"]
-    demand_signal = data["demand_signal"]
-    product_score = data["product_score"]
-    category = data["product_category_name"]
+    # Products with near-identical features in the same category share insights
+    cache = get_insights_cache(config_path)
+    cache_key = cache.make_key(data)
+    insights = cache.get(cache_key)
+    if insights is not None:
+        logger.info("Insights cache hit (%s)", cache_key)
+        return insights
     
     # Craft a prompt for OpenAI API
-    prompt = (
-        f"Generate market insights for a product in the {category} category. "
-        f"The product's price is ${price_gap:.2f} {'above' if price_gap > 0 else 'below'} the average competitor price. "
-        f"Demand signal is {demand_signal:.3f} (normalized qty, max 1.0). "
-        f"Product score is {product_score:.1f} out of 5. "
-        f"Provide detailed insights in 5-6 lines, focusing on pricing strategy, demand trends, and quality perception."
-    )
+    prompt = build_prompt(data)
     
     try:
-        # Call OpenAI API using the new interface
-        response = client.chat.completions.create(
-            model="gpt-4",  # You can use "gpt-4" if available
-            messages=[
-                {"role": "system", "content": "You are a market analyst providing pricing and demand insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,  # Enough for 5-6 lines
-            temperature=0.7  # Balanced creativity
-        )
-        insights = response.choices[0].message.content.strip()
-        logger.info("Insights generated successfully via OpenAI API")
+        with STAGES["llm"].time():
+            if use_local_backend(config_path):
+                insights = get_local_backend(config_path).model.generate([prompt])[0]
+            else:
+                # Call OpenAI API using the new interface
+                response = get_client().chat.completions.create(**chat_request(prompt))
+                insights = response.choices[0].message.content.strip()
+        cache.set(cache_key, insights)
+        logger.info("Insights generated successfully")
         return insights
     except Exception as e:
-        logger.error(f"Failed to generate insights via OpenAI API: {str(e)}")
+        logger.error(f"Failed to generate insights: {str(e)}")
         raise
 
+async def generate_insights_async(data: dict, config_path: str) -> str:
+    """Generate market insights without blocking the event loop."""
+    logger = setup_logger(config_path)
+    logger.info("Generating insights for product: %s", data["product_id"])
+    
+    cache = get_insights_cache(config_path)
+    cache_key = cache.make_key(data)
+    insights = await cache.get_async(cache_key)
+    if insights is not None:
+        logger.info("Insights cache hit (%s)", cache_key)
+        return insights
+    
+    prompt = build_prompt(data)
+    
+    async def call_upstream() -> str:
+        with STAGES["llm"].time():
+            if use_local_backend(config_path):
+                return await get_local_backend(config_path).generate(prompt)
+            response = await get_async_client(config_path).chat.completions.create(**chat_request(prompt))
+        return response.choices[0].message.content.strip()
+    
+    try:
+        # Identical in-flight prompts share one upstream call
+        insights = await get_insights_gateway(config_path).call(prompt, call_upstream)
+        await cache.set_async(cache_key, insights)
+        logger.info("Insights generated successfully")
+        return insights
+    except Exception as e:
+        logger.error(f"Failed to generate insights: {str(e)}")
+        raise
+
+async def _local_stream(config_path: str, prompt: str):
+    """Run the local model's token stream in a worker thread, one step at a time.
+
+    On cancellation the stop flag ends decoding at the next token, and the step running in
+    the thread is awaited before the generator is closed, so decoding never outlives the caller.
+    """
+    stop = threading.Event()
+    tokens = get_local_backend(config_path).model.stream(prompt, stop=stop)
+    step = None
+    try:
+        while True:
+            step = asyncio.get_running_loop().run_in_executor(None, next, tokens, None)
+            text = await asyncio.shield(step)
+            if text is None:
+                break
+            yield text
+    finally:
+        stop.set()
+        if step is not None and not step.done():
+            await asyncio.wait([step])
+        tokens.close()
+
+async def generate_insights_stream(data: dict, config_path: str):
+    """Generate market insights, yielding text as soon as the model produces it.
+
+    Closing the generator (e.g. on client disconnect) closes the upstream stream,
+    so abandoned completions stop generating.
+    """
+    logger = setup_logger(config_path)
+    logger.info("Streaming insights for product: %s", data["product_id"])
+    
+    cache = get_insights_cache(config_path)
+    cache_key = cache.make_key(data)
+    insights = await cache.get_async(cache_key)
+    if insights is not None:
+        logger.info("Insights cache hit (%s)", cache_key)
+        yield insights
+        return
+    
+    prompt = build_prompt(data)
+    gateway = get_insights_gateway(config_path)
+    parts = []
+    async with gateway.slot():
+        with STAGES["llm"].time():
+            if use_local_backend(config_path):
+                stream = _local_stream(config_path, prompt)
+            else:
+                stream = await asyncio.wait_for(
+                    get_async_client(config_path).chat.completions.create(**chat_request(prompt), stream=True),
+                    gateway.timeout_seconds
+                )
+            try:
+                iterator = stream.__aiter__()
+                while True:
+                    # Time out on a stalled stream rather than on the whole completion
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), gateway.timeout_seconds)
+                    except StopAsyncIteration:
+                        break
+                    text = chunk if isinstance(chunk, str) else (chunk.choices[0].delta.content if chunk.choices else None)
+                    if text:
+                        parts.append(text)
+                        yield text
+            finally:
+                if isinstance(stream, AsyncGenerator):
+                    await stream.aclose()
+                else:
+                    await stream.close()
+    
+    insights = "".join(parts).strip()
+    await cache.set_async(cache_key, insights)
+    logger.info("Insights streamed successfully")
+
 if __name__ == "__main__":
     # Run fine_tune_genai
     fine_tune_genai("config/config.yaml")
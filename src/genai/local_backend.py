@@ -0,0 +1,218 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import os
+import threading
+import torch
+from transformers import DynamicCache
+from transformers.pytorch_utils import Conv1D
+
+def linearize_conv1d(model: torch.nn.Module) -> torch.nn.Module:
+    """Swap GPT-2 style Conv1D projections for equivalent nn.Linear layers (dynamic quantization skips Conv1D)."""
+    for name, module in list(model.named_children()):
+        if isinstance(module, Conv1D):
+            in_features, out_features = module.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            linearize_conv1d(module)
+    return model
+
+def quantize_model(model: torch.nn.Module) -> torch.nn.Module:
+    """Apply dynamic int8 quantization to every Linear layer for CPU inference."""
+    return torch.ao.quantization.quantize_dynamic(linearize_conv1d(model), {torch.nn.Linear}, dtype=torch.qint8)
+
+def cache_pairs(past_key_values) -> list:
+    """Per-layer (keys, values) from a Cache object (any transformers version) or a legacy tuple."""
+    layers = getattr(past_key_values, "layers", None)
+    if layers is not None:
+        return [(layer.keys, layer.values) for layer in layers]
+    if hasattr(past_key_values, "key_cache"):
+        return list(zip(past_key_values.key_cache, past_key_values.value_cache))
+    return [(keys, values) for keys, values in past_key_values]
+
+class LocalInsightsModel:
+    """CPU causal LM for insights that reuses the KV cache of the fixed system prompt + template prefix."""
+    def __init__(self, model, tokenizer, system_prompt: str, prompt_prefix: str, max_new_tokens: int = 150,
+                 temperature: float = 0.0, quantize: bool = True):
+        model.eval()
+        self.model = quantize_model(model) if quantize else model
+        self.tokenizer = tokenizer
+        self.prompt_prefix = prompt_prefix
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else self.eos_token_id
+
+        # Every prompt starts with this text; its keys/values are computed once
+        prefix_ids = tokenizer.encode(f"{system_prompt}\n\nUser: {prompt_prefix}", add_special_tokens=False)
+        with torch.inference_mode():
+            output = self.model(torch.tensor([prefix_ids]), use_cache=True)
+        # transformers<4.47 returns a tuple of (key, value) pairs per layer instead of a Cache
+        self.legacy_cache = isinstance(output.past_key_values, tuple)
+        self.prefix_cache = cache_pairs(output.past_key_values)
+        self.prefix_length = len(prefix_ids)
+
+    @classmethod
+    def from_config(cls, config: dict, system_prompt: str, prompt_prefix: str) -> "LocalInsightsModel":
+        """Load genai.model_name, merging the LoRA adapter at genai.adapter_path when one was saved."""
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        genai_config = config.get("genai", {})
+        local_config = genai_config.get("local", {})
+        hf_token = os.getenv("HUGGINGFACE_TOKEN") or None
+        tokenizer = AutoTokenizer.from_pretrained(genai_config["model_name"], token=hf_token)
+        model = AutoModelForCausalLM.from_pretrained(genai_config["model_name"], token=hf_token, device_map="cpu")
+        adapter_path = genai_config.get("adapter_path", "models/insights_lora")
+        if os.path.isdir(adapter_path):
+            from peft import PeftModel
+            model = PeftModel.from_pretrained(model, adapter_path).merge_and_unload()
+        return cls(
+            model, tokenizer, system_prompt, prompt_prefix,
+            max_new_tokens=local_config.get("max_new_tokens", 150),
+            temperature=local_config.get("temperature", 0.0),
+            quantize=local_config.get("quantize", True)
+        )
+
+    def _batch_cache(self, batch_size: int):
+        if self.legacy_cache:
+            return tuple(
+                (keys.expand(batch_size, -1, -1, -1).contiguous(), values.expand(batch_size, -1, -1, -1).contiguous())
+                for keys, values in self.prefix_cache
+            )
+        cache = DynamicCache()
+        for layer, (keys, values) in enumerate(self.prefix_cache):
+            cache.update(
+                keys.expand(batch_size, -1, -1, -1).contiguous(),
+                values.expand(batch_size, -1, -1, -1).contiguous(),
+                layer
+            )
+        return cache
+
+    def _next_tokens(self, logits: torch.Tensor) -> torch.Tensor:
+        if self.temperature > 0:
+            probabilities = torch.softmax(logits / self.temperature, dim=-1)
+            return torch.multinomial(probabilities, 1).squeeze(-1)
+        return logits.argmax(dim=-1)
+
+    def _decode(self, prompts: list):
+        """Decode a batch of build_prompt() prompts, yielding [(index, token), ...] for each step."""
+        suffixes = []
+        for prompt in prompts:
+            if not prompt.startswith(self.prompt_prefix):
+                raise ValueError("Prompt does not start with the cached prompt prefix")
+            suffixes.append(self.tokenizer.encode(f"{prompt[len(self.prompt_prefix):]}\nAnalyst:", add_special_tokens=False))
+
+        # Left-pad suffixes between the shared prefix and the text; pads are masked out
+        # and positions continue from the prefix as if they were not there
+        batch_size = len(suffixes)
+        width = max(len(ids) for ids in suffixes)
+        input_ids = torch.tensor([[self.pad_token_id] * (width - len(ids)) + ids for ids in suffixes])
+        suffix_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in suffixes])
+        attention_mask = torch.cat([torch.ones(batch_size, self.prefix_length, dtype=torch.long), suffix_mask], dim=1)
+        position_ids = (self.prefix_length + suffix_mask.cumsum(dim=1) - 1).clamp(min=self.prefix_length)
+
+        finished = torch.zeros(batch_size, dtype=torch.bool)
+        with torch.inference_mode():
+            output = self.model(input_ids, past_key_values=self._batch_cache(batch_size),
+                                attention_mask=attention_mask, position_ids=position_ids, use_cache=True)
+            next_position = position_ids[:, -1:] + 1
+            for _ in range(self.max_new_tokens):
+                tokens = self._next_tokens(output.logits[:, -1])
+                tokens[finished] = self.pad_token_id
+                yield [
+                    (i, int(tokens[i])) for i in (~finished).nonzero().flatten().tolist()
+                    if tokens[i] != self.eos_token_id
+                ]
+                finished |= tokens == self.eos_token_id
+                if finished.all():
+                    break
+                attention_mask = torch.cat([attention_mask, torch.ones(batch_size, 1, dtype=torch.long)], dim=1)
+                # Legacy caches are returned as new tuples rather than updated in place
+                output = self.model(tokens[:, None], past_key_values=output.past_key_values,
+                                    attention_mask=attention_mask, position_ids=next_position, use_cache=True)
+                next_position = next_position + 1
+
+    def generate(self, prompts: list) -> list:
+        """Complete a batch of build_prompt() prompts in one decoding loop."""
+        generated = [[] for _ in prompts]
+        for step in self._decode(prompts):
+            for i, token in step:
+                generated[i].append(token)
+        return [self.tokenizer.decode(ids, skip_special_tokens=True).strip() for ids in generated]
+
+    def stream(self, prompt: str, stop: threading.Event = None):
+        """Yield the completion of one prompt as text increments, token by token; setting stop ends it early."""
+        ids, sent, text = [], "", ""
+        for step in self._decode([prompt]):
+            if stop is not None and stop.is_set():
+                return
+            ids.extend(token for _, token in step)
+            # Decode the whole completion and hold back a trailing partial multi-byte character
+            text = self.tokenizer.decode(ids, skip_special_tokens=True).lstrip()
+            if len(text) > len(sent) and not text.endswith("\ufffd"):
+                yield text[len(sent):]
+                sent = text
+        if len(text.rstrip()) > len(sent):
+            yield text.rstrip()[len(sent):]
+
+class LocalInsightsBatcher:
+    """Coalesce concurrent insight requests into one batched generation run off the event loop."""
+    def __init__(self, model: LocalInsightsModel, max_batch_size: int = 8, batch_window_ms: float = 10.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000.0
+        self._queue = None
+        self._worker = None
+
+    async def generate(self, prompt: str) -> str:
+        """Queue one prompt and wait for its completion."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect prompts for up to batch_window seconds, then generate them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(items) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Requests cancelled while queued (e.g. gateway timeout) are dropped
+            items = [(prompt, future) for prompt, future in items if not future.done()]
+            if not items:
+                continue
+            try:
+                completions = await asyncio.to_thread(self.model.generate, [prompt for prompt, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), completion in zip(items, completions):
+                if not future.done():
+                    future.set_result(completion)
+
+    async def close(self) -> None:
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
@@ -0,0 +1,151 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import json
+import logging
+import os
+import shutil
+from urllib.parse import quote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.ingestion.local_ingestion import iter_csv_batches
+
+logger = logging.getLogger("DynamicPricing")
+
+KEY_COLUMNS = ["product_id", "month_year"]
+PARTITION_COLUMNS = ["product_category_name", "year"]
+STATE_FILE = "_ingestion_state.json"
+
+def _period(month_year: pa.Array) -> pa.Array:
+    """Turn dd-mm-yyyy month_year strings into yyyymm integers."""
+    year = pc.cast(pc.utf8_slice_codeunits(month_year, 6, 10), pa.int64())
+    month = pc.cast(pc.utf8_slice_codeunits(month_year, 3, 5), pa.int64())
+    return pc.add(pc.multiply(year, 100), month)
+
+def load_state(output_path: str) -> dict:
+    """Return the ingestion state (watermark and last changed partitions) of a table."""
+    state_path = os.path.join(output_path, STATE_FILE)
+    if not os.path.exists(state_path):
+        return {"watermark": None, "changed_partitions": []}
+    with open(state_path, "r") as file:
+        return json.load(file)
+
+def _save_state(output_path: str, state: dict) -> None:
+    state_path = os.path.join(output_path, STATE_FILE)
+    with open(f"{state_path}.tmp", "w") as file:
+        json.dump(state, file, indent=2)
+    os.replace(f"{state_path}.tmp", state_path)
+
+def partition_path(output_path: str, category: str, year: int) -> str:
+    """Hive-style directory of one product_category_name/year partition."""
+    return os.path.join(output_path, f"product_category_name={quote(str(category), safe='')}", f"year={year}")
+
+def _stage_batch(batch: pa.RecordBatch, period: pa.Array, data_columns: list, staging_path: str, writers: dict) -> None:
+    """Append each partition's rows of one batch to its staging file."""
+    categories = batch.column("product_category_name")
+    years = pc.divide(period, 100)
+    keys = pa.table({"category": categories, "year": years}).group_by(["category", "year"]).aggregate([])
+    for category, year in zip(keys.column("category").to_pylist(), keys.column("year").to_pylist()):
+        if category is None or year is None:
+            continue
+        rows = batch.filter(pc.and_(pc.equal(categories, category), pc.equal(years, year))).select(data_columns)
+        if (category, year) not in writers:
+            stage_file = os.path.join(staging_path, f"{len(writers)}.parquet")
+            writers[(category, year)] = (stage_file, pq.ParquetWriter(stage_file, rows.schema))
+        writers[(category, year)][1].write_batch(rows)
+
+def _upsert_partition(output_path: str, category: str, year: int, stage_file: str) -> bool:
+    """Merge staged rows into one partition file; returns whether its contents changed."""
+    directory = partition_path(output_path, category, year)
+    part_file = os.path.join(directory, "part-0.parquet")
+    rows = pq.read_table(stage_file).to_pandas()
+    existing = pq.read_table(part_file).to_pandas() if os.path.exists(part_file) else None
+    if existing is not None:
+        rows = pd.concat([existing, rows], ignore_index=True)
+    rows = rows.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+
+    # Restated rows identical to the stored ones leave the partition untouched
+    if existing is not None and rows.sort_values(KEY_COLUMNS, ignore_index=True).equals(
+            existing.sort_values(KEY_COLUMNS, ignore_index=True)):
+        return False
+
+    # Swap the partition file in atomically
+    os.makedirs(directory, exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), f"{part_file}.tmp")
+    os.replace(f"{part_file}.tmp", part_file)
+    return True
+
+def ingest_incremental(data_path: str, output_path: str, selected_columns: list,
+                       block_size: int = 16 * 1024 * 1024) -> dict:
+    """Upsert rows at or after the month_year watermark into a table partitioned by category and year.
+
+    Batches are staged per partition as they stream in, then each staged partition is merged
+    into its file, so memory is bounded by the largest partition rather than the delta.
+    Rows are keyed by product_id + month_year, with the newest ingest winning; only partitions
+    whose contents change are rewritten and reported. Returns the new ingestion state.
+    """
+    missing = [name for name in KEY_COLUMNS + ["product_category_name"] if name not in selected_columns]
+    if missing:
+        raise ValueError(f"Incremental ingestion needs columns {missing} in data.selected_columns")
+
+    state = load_state(output_path)
+    watermark = state["watermark"]
+    logger.info(f"Incremental ingestion of {data_path} into {output_path} (watermark: {watermark})")
+
+    # Stage the delta: only rows at or after the watermark, one file per partition
+    data_columns = [name for name in selected_columns if name not in PARTITION_COLUMNS]
+    staging_path = os.path.join(output_path, "_staging")
+    shutil.rmtree(staging_path, ignore_errors=True)
+    os.makedirs(staging_path)
+    writers = {}
+    rows = 0
+    new_watermark = watermark
+    try:
+        try:
+            for batch in iter_csv_batches(data_path, selected_columns, block_size):
+                period = _period(batch.column("month_year"))
+                if watermark is not None:
+                    keep = pc.greater_equal(period, watermark)
+                    batch = batch.filter(keep)
+                    period = period.filter(keep)
+                if batch.num_rows == 0:
+                    continue
+                batch_max = pc.max(period).as_py()
+                new_watermark = batch_max if new_watermark is None else max(new_watermark, batch_max)
+                rows += batch.num_rows
+                _stage_batch(batch, period, data_columns, staging_path, writers)
+        finally:
+            for _, writer in writers.values():
+                writer.close()
+
+        changed = [
+            [category, int(year)]
+            for (category, year), (stage_file, _) in sorted(writers.items())
+            if _upsert_partition(output_path, category, int(year), stage_file)
+        ]
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+    state = {"watermark": new_watermark, "changed_partitions": changed}
+    _save_state(output_path, state)
+    logger.info(f"Upserted {rows} rows since the watermark; {len(changed)} partitions changed (watermark: {new_watermark})")
+    return state
+
+def read_partitions(output_path: str, partitions: list = None, columns: list = None) -> pd.DataFrame:
+    """Read the partitioned table, optionally only the given [category, year] partitions."""
+    dataset = ds.dataset(output_path, format="parquet", partitioning="hive")
+    expression = None
+    for category, year in partitions or []:
+        match = (ds.field("product_category_name") == category) & (ds.field("year") == year)
+        expression = match if expression is None else expression | match
+    if partitions is not None and expression is None:
+        return dataset.schema.empty_table().to_pandas()
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def read_changed_partitions(output_path: str, columns: list = None) -> pd.DataFrame:
+    """Read only the partitions rewritten by the last ingestion run."""
+    return read_partitions(output_path, load_state(output_path)["changed_partitions"], columns)
@@ -1,5 +1,8 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
 import logging
-from pyspark.sql import SparkSession
 import yaml
 import os
 
@@ -8,6 +11,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("DynamicPricing")
 
 def get_spark_session():
+    from pyspark.sql import SparkSession
+
     connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     if not connection_string:
         raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable not set")
@@ -23,6 +28,31 @@ def get_spark_session():
              .getOrCreate())
     return spark
 
+def merge_incremental(spark, data, delta_path):
+    """Upsert rows at or after the month_year watermark into a Delta table partitioned by category and year."""
+    from pyspark.sql import functions as F
+    from delta.tables import DeltaTable
+
+    period = F.to_date(F.col("month_year"), "dd-MM-yyyy")
+    if "year" not in data.columns:
+        data = data.withColumn("year", F.year(period))
+
+    if not DeltaTable.isDeltaTable(spark, delta_path):
+        logger.info(f"Creating partitioned Delta table: {delta_path}")
+        data.write.format("delta").partitionBy("product_category_name", "year").save(delta_path)
+        return
+
+    table = DeltaTable.forPath(spark, delta_path)
+    watermark = table.toDF().agg(F.max(period)).first()[0]
+    if watermark is not None:
+        data = data.filter(period >= F.lit(watermark))
+    logger.info(f"Merging rows since {watermark} into Delta table: {delta_path}")
+    (table.alias("t")
+     .merge(data.alias("s"), "t.product_id = s.product_id AND t.month_year = s.month_year")
+     .whenMatchedUpdateAll()
+     .whenNotMatchedInsertAll()
+     .execute())
+
 def ingest_data(config_path):
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
@@ -31,14 +61,45 @@ def ingest_data(config_path):
     delta_path = config['spark']['delta_table']
     selected_columns = config['data']['selected_columns']
     
+    # ingestion.mode: "spark" (default) or "local" (JVM-free streaming engine)
+    # ingestion.incremental: upsert rows since the month_year watermark into
+    # partitions by product_category_name/year instead of overwriting
+    ingestion_config = config.get('ingestion', {})
+    incremental = ingestion_config.get('incremental', False)
+    if ingestion_config.get('mode', 'spark') == 'local':
+        from src.ingestion.local_ingestion import ingest_local
+        from src.ingestion.incremental import ingest_incremental
+        output_path = ingestion_config.get('output_path', delta_path)
+        block_size = int(ingestion_config.get('block_size_mb', 16) * 1024 * 1024)
+        try:
+            if incremental:
+                state = ingest_incremental(data_path, output_path, selected_columns, block_size=block_size)
+                logger.info(f"Incremental ingestion completed successfully ({len(state['changed_partitions'])} partitions changed)")
+                return
+            rows = ingest_local(
+                data_path,
+                output_path,
+                selected_columns,
+                output_format=ingestion_config.get('format', 'parquet'),
+                block_size=block_size
+            )
+            logger.info(f"Data ingestion completed successfully ({rows} rows)")
+        except Exception as e:
+            logger.error(f"Ingestion failed: {str(e)}")
+            raise
+        return
+    
     logger.info(f"Reading data from {data_path}")
     spark = get_spark_session()
     
     try:
         data = spark.read.csv(data_path, header=True, inferSchema=True)
         data = data.select(selected_columns)
-        logger.info(f"Writing to Delta table: {delta_path}")
-        data.write.format("delta").mode("overwrite").save(delta_path)
+        if incremental:
+            merge_incremental(spark, data, delta_path)
+        else:
+            logger.info(f"Writing to Delta table: {delta_path}")
+            data.write.format("delta").mode("overwrite").save(delta_path)
         logger.info("Data ingestion completed successfully")
         
         # Preview the ingested data
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import logging
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger("DynamicPricing")
+
+# Explicit schema of retail_data.csv, so no inference pass is needed
+RETAIL_SCHEMA = pa.schema([
+    ("product_id", pa.string()),
+    ("product_category_name", pa.string()),
+    ("month_year", pa.string()),
+    ("qty", pa.int64()),
+    ("total_price", pa.float64()),
+    ("freight_price", pa.float64()),
+    ("unit_price", pa.float64()),
+    ("product_name_lenght", pa.int64()),
+    ("product_description_lenght", pa.int64()),
+    ("product_photos_qty", pa.int64()),
+    ("product_weight_g", pa.int64()),
+    ("product_score", pa.float64()),
+    ("customers", pa.int64()),
+    ("weekday", pa.int64()),
+    ("weekend", pa.int64()),
+    ("holiday", pa.int64()),
+    ("month", pa.int64()),
+    ("year", pa.int64()),
+    ("s", pa.float64()),
+    ("volume", pa.int64()),
+    ("comp_1", pa.float64()),
+    ("ps1", pa.float64()),
+    ("fp1", pa.float64()),
+    ("comp_2", pa.float64()),
+    ("ps2", pa.float64()),
+    ("fp2", pa.float64()),
+    ("comp_3", pa.float64()),
+    ("ps3", pa.float64()),
+    ("fp3", pa.float64()),
+    ("lag_price", pa.float64())
+])
+
+def iter_csv_batches(data_path: str, selected_columns: list, block_size: int = 16 * 1024 * 1024):
+    """Yield record batches from the CSV, parsing one line-aligned block of block_size bytes at a time.
+
+    Blocks are read and split here rather than by pyarrow's streaming reader,
+    which reads far ahead of the consumer. Fields must not contain embedded
+    newlines (true for retail_data.csv).
+    """
+    with open(data_path, "rb") as source:
+        header = source.readline()
+        column_names = header.decode("utf-8").strip().split(",")
+        read_options = pv.ReadOptions(column_names=column_names)
+        convert_options = pv.ConvertOptions(
+            column_types={field.name: field.type for field in RETAIL_SCHEMA},
+            include_columns=selected_columns
+        )
+        remainder = b""
+        while True:
+            data = source.read(block_size)
+            if not data:
+                block, remainder = remainder, b""
+            else:
+                data = remainder + data
+                cut = data.rfind(b"\n") + 1
+                block, remainder = data[:cut], data[cut:]
+            if not block:
+                if not data:
+                    break
+                continue
+            table = pv.read_csv(pa.py_buffer(block), read_options=read_options, convert_options=convert_options)
+            yield from table.to_batches()
+
+def ingest_local(data_path: str, output_path: str, selected_columns: list, output_format: str = "parquet",
+                 block_size: int = 16 * 1024 * 1024) -> int:
+    """Stream the CSV into Parquet (or a Delta table via deltalake) with bounded memory.
+
+    Returns the number of rows written.
+    """
+    logger.info(f"Streaming {data_path} to {output_format} at {output_path} (block size {block_size} bytes)")
+    batches = iter_csv_batches(data_path, selected_columns, block_size)
+    schema = pa.schema([RETAIL_SCHEMA.field(name) for name in selected_columns])
+    return _write_stream(pa.RecordBatchReader.from_batches(schema, batches), output_path, output_format)
+
+def _write_stream(reader: pa.RecordBatchReader, output_path: str, output_format: str) -> int:
+    if output_format == "delta":
+        # delta-rs writes the Delta log without a JVM
+        from deltalake import write_deltalake
+        rows = 0
+
+        def count_batches():
+            nonlocal rows
+            for batch in reader:
+                rows += batch.num_rows
+                yield batch
+
+        write_deltalake(
+            output_path,
+            pa.RecordBatchReader.from_batches(reader.schema, count_batches()),
+            mode="overwrite"
+        )
+        return rows
+
+    if output_format != "parquet":
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    # Write into a fresh directory and swap it in, so readers never see a partial table
+    temp_path = f"{output_path}.tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+    rows = 0
+    with pq.ParquetWriter(os.path.join(temp_path, "part-00000.parquet"), reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    shutil.rmtree(output_path, ignore_errors=True)
+    os.replace(temp_path, output_path)
+    return rows
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+class _BlobProperties:
+    def __init__(self, name: str, etag: str, size: int):
+        self.name = name
+        self.etag = etag
+        self.size = size
+
+class _FileDownloader:
+    def __init__(self, path: str, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        with open(self.path, "rb") as file:
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+class LocalBlobClient:
+    """Filesystem-backed stand-in for azure.storage.blob.BlobClient (properties + chunked download)."""
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.blob_name = os.path.basename(path)
+        self.chunk_size = chunk_size
+        self.download_count = 0
+
+    def get_blob_properties(self) -> _BlobProperties:
+        stat = os.stat(self.path)
+        return _BlobProperties(self.blob_name, f'"{stat.st_mtime_ns:x}"', stat.st_size)
+
+    def download_blob(self) -> _FileDownloader:
+        self.download_count += 1
+        return _FileDownloader(self.path, self.chunk_size)
+
+def fetch_blob(blob_client, cache_dir: str, logger=None) -> str:
+    """Return a local copy of the blob, downloading only when its ETag/size changed.
+
+    Files are content-addressed by blob name, ETag and size, so an unchanged blob
+    is never downloaded twice and a changed one never overwrites a file in use.
+    """
+    properties = blob_client.get_blob_properties()
+    blob_name = os.path.basename(properties.name)
+    stem, suffix = os.path.splitext(blob_name)
+    digest = hashlib.sha256(f"{properties.name}:{properties.etag}:{properties.size}".encode()).hexdigest()[:16]
+    local_path = os.path.join(cache_dir, f"{stem}-{digest}{suffix}")
+
+    if os.path.exists(local_path) and os.path.getsize(local_path) == properties.size:
+        if logger:
+            logger.info(f"Using cached copy {local_path} (etag {properties.etag})")
+        return local_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{local_path}.part"
+    if logger:
+        logger.info(f"Downloading {properties.size} bytes to {local_path}")
+    try:
+        with open(temp_path, "wb") as temp_file:
+            for chunk in blob_client.download_blob().chunks():
+                temp_file.write(chunk)
+        if os.path.getsize(temp_path) != properties.size:
+            raise IOError(f"Downloaded size {os.path.getsize(temp_path)} does not match blob size {properties.size}")
+        os.replace(temp_path, local_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    # Drop older versions of the same blob
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{stem}-") and name.endswith(suffix) and os.path.join(cache_dir, name) != local_path:
+            os.remove(os.path.join(cache_dir, name))
+    return local_path
+
+def read_parquet_columns(path: str, columns: list = None) -> pd.DataFrame:
+    """Read only the requested columns, memory-mapping the Parquet file through Arrow."""
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
@@ -0,0 +1,189 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import os
+import numpy as np
+import pandas as pd
+import yaml
+
+# Raw columns the elasticity fit reads from the processed dataset
+FIT_COLUMNS = ["product_id", "product_category_name", "unit_price", "qty", "comp_1", "comp_2", "comp_3"]
+
+# Fitted elasticities are clipped to this range; anything flatter than -0.1 makes the
+# profit-maximizing price run to the candidate bound
+ELASTICITY_BOUNDS = (-5.0, -0.1)
+
+def _fit_groups(frame: pd.DataFrame, keys: list, min_observations: int) -> pd.DataFrame:
+    """OLS of log(qty) on log(unit_price), controlling for log(avg competitor price), within each group.
+
+    Solved from grouped sums of the demeaned regressors, so every group is fitted in one pass.
+    """
+    grouped = frame.groupby(keys, sort=False)
+    x1 = frame["log_price"] - grouped["log_price"].transform("mean")
+    x2 = frame["log_comp"] - grouped["log_comp"].transform("mean")
+    y = frame["log_qty"] - grouped["log_qty"].transform("mean")
+    sums = pd.DataFrame({
+        "s11": x1 * x1, "s12": x1 * x2, "s22": x2 * x2, "s1y": x1 * y, "s2y": x2 * y
+    }).groupby([frame[key] for key in keys], sort=False).sum()
+    sums["n"] = grouped.size()
+
+    det = sums["s11"] * sums["s22"] - sums["s12"] ** 2
+    # Without independent competitor variation fall back to the simple regression slope
+    collinear = det <= 1e-9 * sums["s11"] * sums["s22"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        elasticity = np.where(
+            collinear,
+            sums["s1y"] / sums["s11"],
+            (sums["s22"] * sums["s1y"] - sums["s12"] * sums["s2y"]) / det
+        )
+    valid = (sums["n"] >= min_observations) & (sums["s11"] > 1e-12) & np.isfinite(elasticity)
+    return pd.DataFrame({
+        "elasticity": np.clip(elasticity, *ELASTICITY_BOUNDS),
+        "n": sums["n"]
+    }, index=sums.index)[valid.to_numpy()]
+
+def fit_elasticities(dataset: pd.DataFrame, level: str = "product", min_observations: int = 8) -> "ElasticityIndex":
+    """Fit price elasticities per product (falling back to category, then global) or per category."""
+    if level not in ("product", "category"):
+        raise ValueError(f"Unsupported elasticity level: {level}")
+    avg_comp = (dataset["comp_1"] + dataset["comp_2"] + dataset["comp_3"]) / 3
+    usable = (dataset["unit_price"] > 0) & (dataset["qty"] > 0) & (avg_comp > 0)
+    frame = pd.DataFrame({
+        "product_id": dataset["product_id"].astype(str),
+        "product_category_name": dataset["product_category_name"].astype(str),
+        "log_price": np.log(dataset["unit_price"].to_numpy(dtype=np.float64)),
+        "log_comp": np.log(avg_comp.to_numpy(dtype=np.float64)),
+        "log_qty": np.log(dataset["qty"].to_numpy(dtype=np.float64)),
+        "all": 0
+    })[usable.to_numpy()]
+
+    overall = _fit_groups(frame, ["all"], 2)
+    global_elasticity = float(overall["elasticity"].iloc[0]) if len(overall) else -1.0
+    categories = _fit_groups(frame, ["product_category_name"], min_observations)
+    products = _fit_groups(frame, ["product_id"], min_observations) if level == "product" else None
+
+    return ElasticityIndex(
+        product_ids=products.index.to_numpy(dtype=str) if products is not None else np.array([], dtype=str),
+        product_elasticity=products["elasticity"].to_numpy() if products is not None else np.array([]),
+        categories=categories.index.to_numpy(dtype=str),
+        category_elasticity=categories["elasticity"].to_numpy(),
+        global_elasticity=global_elasticity
+    )
+
+class ElasticityIndex:
+    """Precomputed elasticities keyed by product and category, with a global fallback."""
+    def __init__(self, product_ids: np.ndarray, product_elasticity: np.ndarray, categories: np.ndarray,
+                 category_elasticity: np.ndarray, global_elasticity: float):
+        self.product_ids = np.asarray(product_ids, dtype=str)
+        self.product_elasticity = np.asarray(product_elasticity, dtype=np.float64)
+        self.categories = np.asarray(categories, dtype=str)
+        self.category_elasticity = np.asarray(category_elasticity, dtype=np.float64)
+        self.global_elasticity = float(global_elasticity)
+        # Hash lookups stay in the microseconds for single requests as well as batches
+        self._by_product = dict(zip(self.product_ids.tolist(), self.product_elasticity.tolist()))
+        self._by_category = dict(zip(self.categories.tolist(), self.category_elasticity.tolist()))
+
+    def lookup(self, product_ids, categories) -> np.ndarray:
+        """Return the elasticity of each product: its own fit, else its category's, else the global one."""
+        by_product, by_category, fallback = self._by_product, self._by_category, self.global_elasticity
+        return np.array([
+            by_product.get(str(product_id), by_category.get(str(category), fallback))
+            for product_id, category in zip(product_ids, categories)
+        ], dtype=np.float64)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                product_ids=self.product_ids,
+                product_elasticity=self.product_elasticity,
+                categories=self.categories,
+                category_elasticity=self.category_elasticity,
+                global_elasticity=self.global_elasticity
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "ElasticityIndex":
+        with np.load(path) as data:
+            return cls(data["product_ids"], data["product_elasticity"], data["categories"],
+                       data["category_elasticity"], float(data["global_elasticity"]))
+
+def optimize_prices(unit_price, qty, elasticity, cost_ratio: float = 0.7, max_change: float = 0.1,
+                    n_candidates: int = 41):
+    """Pick the profit-maximizing price among candidates within +/-max_change of the current price.
+
+    Demand follows constant elasticity from the current point, qty * (p / unit_price) ** elasticity,
+    and unit cost is cost_ratio * unit_price. Returns (price_adjustment, expected_qty, expected_profit).
+    """
+    unit_price = np.asarray(unit_price, dtype=np.float64)[:, None]
+    qty = np.asarray(qty, dtype=np.float64)[:, None]
+    elasticity = np.asarray(elasticity, dtype=np.float64)[:, None]
+    adjustments = np.linspace(-max_change, max_change, n_candidates)
+
+    # (N, K) grid: every product against every candidate adjustment
+    demand = qty * (1 + adjustments) ** elasticity
+    profit = unit_price * (1 + adjustments - cost_ratio) * demand
+    best = np.argmax(profit, axis=1)
+    rows = np.arange(len(best))
+    return adjustments[best], demand[rows, best], profit[rows, best]
+
+class ElasticityEngine:
+    """Closed-form pricing engine: indexed elasticities plus a vectorized candidate-price search."""
+    def __init__(self, index: ElasticityIndex, cost_ratio: float = 0.7, max_change: float = 0.1,
+                 n_candidates: int = 41):
+        self.index = index
+        self.cost_ratio = cost_ratio
+        self.max_change = max_change
+        self.n_candidates = n_candidates
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ElasticityEngine":
+        """Load the index named by model.elasticity.path and the search settings next to it."""
+        engine_config = config.get("model", {}).get("elasticity", {})
+        return cls(
+            ElasticityIndex.load(engine_config.get("path", "models/elasticity_index.npz")),
+            cost_ratio=engine_config.get("cost_ratio", 0.7),
+            max_change=engine_config.get("max_change", 0.1),
+            n_candidates=engine_config.get("n_candidates", 41)
+        )
+
+    def recommend(self, columns) -> dict:
+        """Price adjustments for a batch given product_id, product_category_name, unit_price and qty columns."""
+        elasticity = self.index.lookup(columns["product_id"], columns["product_category_name"])
+        adjustment, expected_qty, expected_profit = optimize_prices(
+            columns["unit_price"], columns["qty"], elasticity,
+            self.cost_ratio, self.max_change, self.n_candidates
+        )
+        return {
+            "price_adjustment": adjustment,
+            "elasticity": elasticity,
+            "expected_qty": expected_qty,
+            "expected_profit": expected_profit
+        }
+
+def fit_elasticity_index(config_path: str) -> ElasticityIndex:
+    """Fit elasticities from the processed dataset and save the index to model.elasticity.path."""
+    from src.model.pricing_model import load_dataset
+    from src.utils.logger import setup_logger
+    logger = setup_logger(config_path)
+
+    with open(config_path, "r") as file:
+        config = yaml.safe_load(file)
+    engine_config = config["model"].get("elasticity", {})
+    level = engine_config.get("level", "product")
+
+    dataset = load_dataset(config_path, columns=FIT_COLUMNS)
+    logger.info(f"Fitting {level}-level price elasticities on {len(dataset)} rows")
+    index = fit_elasticities(dataset, level=level, min_observations=engine_config.get("min_observations", 8))
+    path = engine_config.get("path", "models/elasticity_index.npz")
+    index.save(path)
+    logger.info(
+        f"Saved elasticity index to {path} ({len(index.product_ids)} products, "
+        f"{len(index.categories)} categories, global {index.global_elasticity:.3f})"
+    )
+    return index
+
+if __name__ == "__main__":
+    fit_elasticity_index("config/config.yaml")
@@ -0,0 +1,218 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import yaml
+from src.model.product_table import ProductTable, SOURCE_COLUMNS, UNIT_PRICE, QTY, OBS_SLICE, latest_rows
+from src.model.vec_env import MAX_STEPS, step_prices
+from src.utils.logger import setup_logger
+
+# Raw columns the evaluation reads from the processed dataset
+EVAL_COLUMNS = ["product_id", "product_category_name", "month_year"] + SOURCE_COLUMNS
+
+# Fixed price adjustments every policy is compared against
+DEFAULT_BASELINES = {"hold": 0.0, "plus_10": 0.1}
+
+# Per-process policies, loaded once by the pool initializer
+_policies = None
+
+class ConstantPolicy:
+    """Baseline that applies the same price adjustment to every product at every step."""
+    def __init__(self, adjustment: float):
+        self.adjustment = adjustment
+
+    def predict(self, observations: np.ndarray, deterministic: bool = True):
+        return np.full((len(observations), 1), self.adjustment, dtype=np.float32), None
+
+def load_policies(policies: dict) -> dict:
+    """Turn {name: model path or constant adjustment} into objects with PPO's predict()."""
+    from src.api.inference import load_policy
+    return {
+        name: ConstantPolicy(float(spec)) if isinstance(spec, (int, float)) else load_policy(spec)
+        for name, spec in policies.items()
+    }
+
+def simulate(policy, matrix: np.ndarray, max_steps: int = MAX_STEPS):
+    """Run one episode for every product row of the matrix at once.
+
+    Uses the VecRetailPricingEnv dynamics; returns (episode profit, final unit price) per product.
+    """
+    unit_price = matrix[:, UNIT_PRICE].astype(np.float64)
+    qty = matrix[:, QTY].astype(np.float64)
+    observations = matrix[:, OBS_SLICE].copy()
+    profit = np.zeros(len(matrix), dtype=np.float64)
+    for _ in range(max_steps):
+        actions, _ = policy.predict(observations, deterministic=True)
+        price_adjustment = np.asarray(actions, dtype=np.float64).reshape(len(matrix))
+        unit_price, qty, reward = step_prices(unit_price, qty, price_adjustment)
+        # Rewards are float32 in the env
+        profit += reward.astype(np.float32)
+        observations[:, 1] = unit_price / 1000.0
+        observations[:, 2] = qty / 1000.0
+    return profit, unit_price
+
+def _init_worker(policies: dict) -> None:
+    global _policies
+    _policies = load_policies(policies)
+
+def evaluate_chunk(args: tuple) -> dict:
+    """Simulate a chunk of products under every policy; returns per-category sums for each policy."""
+    matrix, category_codes, n_categories, max_steps = args
+    initial_price = matrix[:, UNIT_PRICE].astype(np.float64)
+    results = {}
+    for name, policy in _policies.items():
+        profit, final_price = simulate(policy, matrix, max_steps)
+        drift = final_price / initial_price - 1
+        results[name] = {
+            "profit": np.bincount(category_codes, weights=profit, minlength=n_categories),
+            "drift": np.bincount(category_codes, weights=drift, minlength=n_categories),
+            "abs_drift": np.bincount(category_codes, weights=np.abs(drift), minlength=n_categories)
+        }
+    return results
+
+def evaluate_policies(dataset: pd.DataFrame, policies: dict, n_workers: int = None, chunk_size: int = 50000,
+                      max_steps: int = MAX_STEPS, start_method: str = "spawn", logger=None) -> dict:
+    """Run every policy for a full episode from the latest state of every product in the dataset.
+
+    policies maps a name to a model path (.npz or SB3 .zip) or a constant price adjustment.
+    Products are split into chunks scored in parallel worker processes.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    latest = latest_rows(dataset)
+    # Products without a positive price would make the drift undefined
+    latest = latest[latest["unit_price"].to_numpy(dtype=np.float64) > 0]
+    matrix = ProductTable.from_dataframe(latest).matrix
+    categories, category_codes = np.unique(latest["product_category_name"].astype(str).to_numpy(), return_inverse=True)
+    counts = np.bincount(category_codes, minlength=len(categories))
+
+    bounds = range(0, len(matrix), max(1, chunk_size))
+    tasks = [
+        (matrix[start:start + chunk_size], category_codes[start:start + chunk_size], len(categories), max_steps)
+        for start in bounds
+    ]
+    if logger:
+        logger.info(
+            f"Evaluating {list(policies)} on {len(matrix)} products over {max_steps} steps: "
+            f"{len(tasks)} chunks, {n_workers} worker(s)"
+        )
+
+    start = time.perf_counter()
+    if n_workers == 1 or len(tasks) == 1:
+        _init_worker(policies)
+        chunk_results = [evaluate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(policies,)
+        ) as pool:
+            chunk_results = list(pool.map(evaluate_chunk, tasks))
+    seconds = time.perf_counter() - start
+
+    report = {"products": len(matrix), "steps": max_steps, "seconds": seconds, "policies": {}}
+    for name in policies:
+        sums = {
+            key: np.sum([result[name][key] for result in chunk_results], axis=0)
+            for key in ("profit", "drift", "abs_drift")
+        } if chunk_results else {key: np.zeros(len(categories)) for key in ("profit", "drift", "abs_drift")}
+        report["policies"][name] = {
+            "total_profit": float(sums["profit"].sum()),
+            "mean_price_drift": float(sums["drift"].sum() / max(len(matrix), 1)),
+            "categories": {
+                category: {
+                    "products": int(counts[i]),
+                    "profit": float(sums["profit"][i]),
+                    "mean_price_drift": float(sums["drift"][i] / counts[i]),
+                    "mean_abs_price_drift": float(sums["abs_drift"][i] / counts[i])
+                }
+                for i, category in enumerate(categories.tolist())
+            }
+        }
+    if logger:
+        logger.info(f"Evaluated {len(policies)} policies on {len(matrix)} products in {seconds:.2f}s")
+    return report
+
+def format_report(report: dict) -> str:
+    """Render the report as a plain-text table: one row per policy and category."""
+    lines = [f"{'policy':<12} {'category':<28} {'products':>9} {'profit':>16} {'price drift':>12}"]
+    for name, result in report["policies"].items():
+        for category, row in result["categories"].items():
+            lines.append(
+                f"{name:<12} {category:<28} {row['products']:>9} {row['profit']:>16.2f} "
+                f"{row['mean_price_drift']:>+12.2%}"
+            )
+        lines.append(
+            f"{name:<12} {'TOTAL':<28} {report['products']:>9} {result['total_profit']:>16.2f} "
+            f"{result['mean_price_drift']:>+12.2%}"
+        )
+    lines.append(f"{report['products']} products x {report['steps']} steps in {report['seconds']:.2f}s")
+    return "\n".join(lines)
+
+def passes_gate(report: dict, policy: str, baseline: str, min_ratio: float = 1.0) -> bool:
+    """Whether the policy's total profit is at least min_ratio times the baseline's."""
+    policies = report["policies"]
+    unknown = [name for name in (policy, baseline) if name not in policies]
+    if unknown:
+        raise ValueError(f"Policies {unknown} are not in the report; choose from {list(policies)}")
+    return policies[policy]["total_profit"] >= min_ratio * policies[baseline]["total_profit"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the pricing policy against baselines over every product.")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--policy", action="append",
+                        help="name=path of a policy to evaluate; repeatable (default: rl=model.path)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: evaluation.n_workers or all cores)")
+    parser.add_argument("--gate", help="Exit non-zero unless the first policy beats this baseline "
+                                       "(default: evaluation.gate_baseline)")
+    args = parser.parse_args()
+
+    logger = setup_logger(args.config)
+    with open(args.config, "r") as file:
+        config = yaml.safe_load(file)
+    eval_config = config.get("evaluation", {})
+
+    if args.policy:
+        policies = dict(spec.split("=", 1) for spec in args.policy)
+    else:
+        policies = {"rl": config["model"].get("path", "models/ppo_policy.npz")}
+    policies.update(eval_config.get("baselines", DEFAULT_BASELINES))
+    baseline = args.gate or eval_config.get("gate_baseline")
+    if baseline and baseline not in policies:
+        parser.error(f"gate baseline {baseline!r} is not an evaluated policy; choose from {list(policies)}")
+
+    from src.model.pricing_model import load_dataset
+    dataset = load_dataset(args.config, columns=EVAL_COLUMNS)
+    report = evaluate_policies(
+        dataset, policies,
+        n_workers=args.workers or eval_config.get("n_workers"),
+        chunk_size=eval_config.get("chunk_size", 50000),
+        max_steps=eval_config.get("max_steps", MAX_STEPS),
+        logger=logger
+    )
+    logger.info(f"Evaluation report:\n{format_report(report)}")
+
+    report_path = eval_config.get("report_path", "models/evaluation.json")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(f"{report_path}.tmp", "w") as file:
+        json.dump(report, file, indent=2)
+    os.replace(f"{report_path}.tmp", report_path)
+    logger.info(f"Wrote evaluation report to {report_path}")
+
+    if baseline:
+        candidate = next(iter(policies))
+        if not passes_gate(report, candidate, baseline, eval_config.get("min_profit_ratio", 1.0)):
+            logger.error(f"Policy {candidate} does not beat the {baseline} baseline; failing the gate")
+            sys.exit(1)
+        logger.info(f"Policy {candidate} passed the gate against {baseline}")
+
+if __name__ == "__main__":
+    main()
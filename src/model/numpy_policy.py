@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+
+# NumPy equivalents of the torch activations an SB3 MlpPolicy can use
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "Identity": lambda x: x
+}
+
+class NumpyPolicy:
+    """Deterministic PPO actor forward pass in NumPy, loaded from an exported .npz file."""
+    def __init__(self, layers: list, activations: list, action_weight: np.ndarray, action_bias: np.ndarray,
+                 low: np.ndarray, high: np.ndarray):
+        self.layers = layers  # [(weight (in, out), bias (out,)), ...]
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.action_weight = action_weight
+        self.action_bias = action_bias
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyPolicy":
+        with np.load(path) as data:
+            n_layers = int(data["n_layers"])
+            layers = [(data[f"layer_{i}_weight"], data[f"layer_{i}_bias"]) for i in range(n_layers)]
+            return cls(layers, [str(name) for name in data["activations"]], data["action_weight"],
+                       data["action_bias"], data["low"], data["high"])
+
+    def predict(self, observations: np.ndarray, deterministic: bool = True):
+        """Return (actions, None) for an (N, obs_dim) or (obs_dim,) batch, like PPO.predict."""
+        observations = np.asarray(observations, dtype=np.float32)
+        x = observations.reshape(-1, observations.shape[-1])
+        for (weight, bias), activation in zip(self.layers, self.activations):
+            x = activation(x @ weight + bias)
+        # Deterministic action is the Gaussian mean, clipped to the action space
+        actions = np.clip(x @ self.action_weight + self.action_bias, self.low, self.high)
+        if observations.ndim == 1:
+            actions = actions[0]
+        return actions, None
+
+def export_policy(model, output_path: str) -> str:
+    """Write the deterministic actor of a PPO model (or saved model path) to an .npz file for NumPy serving."""
+    import torch
+    from gymnasium.spaces import Box
+    if isinstance(model, str):
+        from stable_baselines3 import PPO
+        model = PPO.load(model, device="cpu", custom_objects={"lr_schedule": lambda _: 0.0, "clip_range": lambda _: 0.0})
+    policy = model.policy
+    if not isinstance(model.action_space, Box) or policy.squash_output:
+        raise ValueError("Only unsquashed Box-action MLP policies can be exported")
+
+    arrays, activations = {}, []
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, torch.nn.Linear):
+            index = len(activations)
+            # Stored as (in, out) so the forward pass is x @ weight + bias
+            arrays[f"layer_{index}_weight"] = module.weight.detach().cpu().numpy().T.astype(np.float32)
+            arrays[f"layer_{index}_bias"] = module.bias.detach().cpu().numpy().astype(np.float32)
+            activations.append("Identity")
+        else:
+            name = type(module).__name__
+            # NumpyPolicy can only replay one supported activation after each linear layer
+            if name not in ACTIVATIONS or not activations or activations[-1] != "Identity":
+                raise ValueError(
+                    f"Cannot export activation {name}: the policy network must alternate Linear layers "
+                    f"with one of {sorted(set(ACTIVATIONS) - {'Identity'})}"
+                )
+            activations[-1] = name
+
+    np.savez(
+        output_path,
+        n_layers=len(activations),
+        activations=np.array(activations),
+        action_weight=policy.action_net.weight.detach().cpu().numpy().T.astype(np.float32),
+        action_bias=policy.action_net.bias.detach().cpu().numpy().astype(np.float32),
+        low=model.action_space.low.astype(np.float32),
+        high=model.action_space.high.astype(np.float32),
+        **arrays
+    )
+    return output_path
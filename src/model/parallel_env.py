@@ -0,0 +1,188 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from gymnasium.spaces import Box
+from stable_baselines3.common.vec_env import VecEnv
+from src.model.vec_env import VecRetailPricingEnv, OBS_DIM
+
+# Shared buffers: name -> (trailing shape, dtype)
+BUFFERS = {
+    "obs": ((OBS_DIM,), np.float32),
+    "actions": ((1,), np.float32),
+    "rewards": ((), np.float32),
+    "dones": ((), np.bool_)
+}
+
+def _attach(names: dict, num_envs: int):
+    """Map the shared-memory blocks as NumPy arrays."""
+    blocks, arrays = {}, {}
+    for key, (shape, dtype) in BUFFERS.items():
+        blocks[key] = SharedMemory(name=names[key])
+        arrays[key] = np.ndarray((num_envs,) + shape, dtype=dtype, buffer=blocks[key].buf)
+    return blocks, arrays
+
+def _worker(remote, parent_remote, names: dict, num_envs: int, start: int, stop: int, env_config: dict) -> None:
+    """Step a slice of envs in a subprocess, exchanging arrays through shared memory."""
+    parent_remote.close()
+    blocks, arrays = _attach(names, num_envs)
+    env = VecRetailPricingEnv(env_config, num_envs=stop - start)
+    try:
+        while True:
+            cmd, arg = remote.recv()
+            if cmd == "step":
+                obs, rewards, dones, infos = env.step(arrays["actions"][start:stop])
+                arrays["obs"][start:stop] = obs
+                arrays["rewards"][start:stop] = rewards
+                arrays["dones"][start:stop] = dones
+                # Only finished envs carry info (terminal observation)
+                remote.send([(i, info) for i, info in enumerate(infos) if info])
+            elif cmd == "reset":
+                if arg is not None:
+                    env.seed(arg)
+                arrays["obs"][start:stop] = env.reset()
+                remote.send(None)
+            elif cmd == "get_attr":
+                remote.send(getattr(env, arg))
+            elif cmd == "set_attr":
+                name, value, indices = arg
+                env.set_attr(name, value, indices)
+                remote.send(None)
+            elif cmd == "env_method":
+                name, args, kwargs, indices = arg
+                remote.send(env.env_method(name, *args, indices=indices, **kwargs))
+            elif cmd == "close":
+                break
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+        remote.close()
+
+class SharedMemVecEnv(VecEnv):
+    """Run VecRetailPricingEnv slices in worker processes that share observation buffers with the learner."""
+    def __init__(self, env_config: dict, num_envs: int = 8, n_workers: int = 2, start_method: str = "spawn"):
+        n_workers = min(n_workers, num_envs)
+        self.slices = [(int(chunk[0]), int(chunk[-1]) + 1) for chunk in np.array_split(np.arange(num_envs), n_workers)]
+
+        # Allocate the shared buffers once; workers write their slice in place
+        self._blocks, self._names = {}, {}
+        for key, (shape, dtype) in BUFFERS.items():
+            size = max(1, int(np.prod((num_envs,) + shape)) * np.dtype(dtype).itemsize)
+            self._blocks[key] = SharedMemory(create=True, size=size)
+            self._names[key] = self._blocks[key].name
+        self._arrays = {
+            key: np.ndarray((num_envs,) + shape, dtype=dtype, buffer=self._blocks[key].buf)
+            for key, (shape, dtype) in BUFFERS.items()
+        }
+
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for start, stop in self.slices:
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(work_remote, remote, self._names, num_envs, start, stop, env_config),
+                daemon=True
+            )
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+
+        # Same spaces as RetailPricingEnv
+        observation_space = Box(low=-np.inf, high=np.inf, shape=(OBS_DIM,), dtype=np.float32)
+        action_space = Box(low=-0.1, high=0.1, shape=(1,), dtype=np.float32)
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, action_space)
+
+    def reset(self) -> np.ndarray:
+        """Reset all workers, seeding each from its first env's seed."""
+        for remote, (start, _) in zip(self.remotes, self.slices):
+            remote.send(("reset", self._seeds[start]))
+        for remote in self.remotes:
+            remote.recv()
+        self._reset_seeds()
+        self._reset_options()
+        return self._arrays["obs"].copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._arrays["actions"][:] = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 1)
+        for remote in self.remotes:
+            remote.send(("step", None))
+
+    def step_wait(self):
+        infos = [{} for _ in range(self.num_envs)]
+        for remote, (start, _) in zip(self.remotes, self.slices):
+            for i, info in remote.recv():
+                infos[start + i] = info
+        return (
+            self._arrays["obs"].copy(),
+            self._arrays["rewards"].copy(),
+            self._arrays["dones"].copy(),
+            infos
+        )
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self.closed = True
+
+    def _indices(self, indices) -> list:
+        if indices is None:
+            return list(range(self.num_envs))
+        if isinstance(indices, int):
+            return [indices]
+        return list(indices)
+
+    def get_attr(self, attr_name: str, indices=None) -> list:
+        if attr_name == "render_mode":
+            return [None for _ in self._indices(indices)]
+        values = []
+        for index in self._indices(indices):
+            worker = next(w for w, (start, stop) in enumerate(self.slices) if start <= index < stop)
+            self.remotes[worker].send(("get_attr", attr_name))
+            values.append(self.remotes[worker].recv())
+        return values
+
+    def _by_worker(self, indices) -> dict:
+        """Group env indices by the worker that hosts them, as {worker: [local index, ...]}."""
+        groups = {}
+        for index in self._indices(indices):
+            worker = next(w for w, (start, stop) in enumerate(self.slices) if start <= index < stop)
+            groups.setdefault(worker, []).append(index - self.slices[worker][0])
+        return groups
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        groups = self._by_worker(indices)
+        for worker, local in groups.items():
+            self.remotes[worker].send(("set_attr", (attr_name, value, local)))
+        for worker in groups:
+            self.remotes[worker].recv()
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> list:
+        """Call the method in the workers hosting indices; results come back in index order."""
+        groups = self._by_worker(indices)
+        for worker, local in groups.items():
+            self.remotes[worker].send(("env_method", (method_name, method_args, method_kwargs, local)))
+        results = {}
+        for worker, local in groups.items():
+            start = self.slices[worker][0]
+            for index, result in zip(local, self.remotes[worker].recv()):
+                results[start + index] = result
+        return [results[index] for index in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list:
+        return [False for _ in self._indices(indices)]
@@ -2,6 +2,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+import argparse
+import json
 import numpy as np
 import gymnasium as gym  # Use gymnasium instead of gym
 from gymnasium.spaces import Box  # Use gymnasium.spaces
@@ -10,8 +12,15 @@ from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 import yaml
 import os
+import time
 from src.utils.logger import setup_logger
+from src.model.product_table import ProductTable, get_product_table, SOURCE_COLUMNS, UNIT_PRICE, QTY, OBS_SLICE
+from src.model.dataset_cache import fetch_blob, read_parquet_columns
+from src.model.numpy_policy import export_policy
+from src.model.vec_env import VecRetailPricingEnv
+from src.model.parallel_env import SharedMemVecEnv
 from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.env_checker import check_env
 
 # Load environment variables from .env file
@@ -26,12 +35,11 @@ class RetailPricingEnv(gym.Env):  # Inherit from gymnasium.Env
         # Action: Price adjustment factor (-10% to +10%)
         self.action_space = Box(low=-0.1, high=0.1, shape=(1,), dtype=np.float32)
         
-        # Dataset features from Parquet file
-        self.dataset = env_config.get("dataset")
-        self.current_row = None
+        # Compact product feature matrix built once from the Parquet dataset
+        self.product_table = get_product_table(env_config)
         self.unit_price = None
         self.qty = None
-        self.features = None
+        self.current_state = None
         self.step_count = 0
         self.max_steps = 100
 
@@ -39,32 +47,17 @@ class RetailPricingEnv(gym.Env):  # Inherit from gymnasium.Env
         self._sample_product()
 
     def _sample_product(self):
-        """Sample a random product from the dataset."""
-        self.current_row = self.dataset.sample(n=1).iloc[0]
-        self.unit_price = self.current_row["unit_price"]
-        self.qty = self.current_row["qty"]
-        
-        # Compute features (same as preprocess.py)
-        avg_comp_price = (self.current_row["comp_1"] + self.current_row["comp_2"] + self.current_row["comp_3"]) / 3
-        self.features = {
-            "price_gap": self.unit_price - avg_comp_price,
-            "normalized_price": self.unit_price / 1000.0,  # Assume max price = 1000
-            "demand_signal": self.qty / 1000.0,  # Assume max qty = 1000
-            "price_trend": self.unit_price - self.current_row["lag_price"],
-            "product_score": self.current_row["product_score"]
-        }
+        """Sample a random product from the product table."""
+        row = self.product_table.matrix[self.product_table.sample(self.np_random)]
+        self.unit_price = float(row[UNIT_PRICE])
+        self.qty = int(row[QTY])
+        # Features are precomputed (same as preprocess.py)
+        self.current_state = row[OBS_SLICE].copy()
 
     def reset(self, seed=None, options=None):
         """Reset environment with a new product."""
         super().reset(seed=seed)  # Call the parent reset method to handle seeding
         self._sample_product()
-        self.current_state = np.array([
-            self.features["price_gap"],
-            self.features["normalized_price"],
-            self.features["demand_signal"],
-            self.features["price_trend"],
-            self.features["product_score"]
-        ], dtype=np.float32)
         self.step_count = 0
         info = {}  # Additional info (empty for now)
         return self.current_state, info  # Gymnasium requires (observation, info)
@@ -72,25 +65,17 @@ class RetailPricingEnv(gym.Env):  # Inherit from gymnasium.Env
     def step(self, action):
         """Take a step in the environment."""
         # Apply price adjustment directly
-        price_adjustment = action[0]  # Already in range [-0.1, 0.1]
+        price_adjustment = float(action[0])  # Already in range [-0.1, 0.1]
         self.unit_price *= (1 + price_adjustment)
         
-        # Update normalized_price
-        self.features["normalized_price"] = self.unit_price / 1000.0
-        
         # Simulate demand response (higher price reduces qty)
         demand_factor = 1 - (price_adjustment * 0.5)  # Higher price lowers demand
         self.qty = max(1, int(self.qty * demand_factor))
-        self.features["demand_signal"] = self.qty / 1000.0
         
-        # Update state
-        self.current_state = np.array([
-            self.features["price_gap"],
-            self.features["normalized_price"],
-            self.features["demand_signal"],
-            self.features["price_trend"],
-            self.features["product_score"]
-        ], dtype=np.float32)
+        # Update state (normalized_price and demand_signal)
+        self.current_state = self.current_state.copy()
+        self.current_state[1] = self.unit_price / 1000.0
+        self.current_state[2] = self.qty / 1000.0
         
         # Calculate reward (profit: qty * (unit_price - cost))
         cost = self.unit_price * 0.7  # Assume 70% cost
@@ -104,56 +89,243 @@ class RetailPricingEnv(gym.Env):  # Inherit from gymnasium.Env
         info = {}  # Additional info (empty for now)
         return self.current_state, reward, terminated, truncated, info  # Gymnasium requires (obs, reward, terminated, truncated, info)
 
-def load_dataset(config_path: str) -> pd.DataFrame:
-    """Load dataset from Azure Blob Storage (Parquet file)."""
+def load_dataset(config_path: str, columns: list = None, blob_client=None, changed_only: bool = False) -> pd.DataFrame:
+    """Load dataset from Azure Blob Storage (Parquet file) through a local ETag-validated cache.
+
+    With data.partitioned_path set, reads the category/year table written by incremental
+    ingestion instead; changed_only then reads just the partitions its last run changed.
+    """
     logger = setup_logger(config_path)
-    logger.info("Loading dataset from Azure Blob Storage (Parquet)")
     
     with open(config_path, "r") as file:
         config = yaml.safe_load(file)
     
-    # Get Azure connection string: prioritize .env, fall back to config.yaml
-    connection_string = os.getenv("AZURE_CONNECTION_STRING")
-    if not connection_string:
-        connection_string = config["azure"].get("connection_string")
-        if not connection_string:
-            raise ValueError("AZURE_CONNECTION_STRING not set in .env and azure.connection_string not found in config.yaml")
-    
-    # Initialize BlobServiceClient
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+    partitioned_path = config.get("data", {}).get("partitioned_path")
+    if partitioned_path and blob_client is None:
+        from src.ingestion.incremental import read_changed_partitions, read_partitions
+        logger.info(f"Loading {'changed partitions' if changed_only else 'dataset'} from {partitioned_path}")
+        if changed_only:
+            return read_changed_partitions(partitioned_path, columns)
+        return read_partitions(partitioned_path, columns=columns)
+    if changed_only:
+        raise ValueError("changed_only needs data.partitioned_path (the incremental ingestion output)")
     
-    try:
+    logger.info("Loading dataset from Azure Blob Storage (Parquet)")
+    if blob_client is None:
+        # Get Azure connection string: prioritize .env, fall back to config.yaml
+        connection_string = os.getenv("AZURE_CONNECTION_STRING")
+        if not connection_string:
+            connection_string = config["azure"].get("connection_string")
+            if not connection_string:
+                raise ValueError("AZURE_CONNECTION_STRING not set in .env and azure.connection_string not found in config.yaml")
+        
+        # Initialize BlobServiceClient
+        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        
         # Define the path to the Parquet file
         container_name = "retail-data"
         blob_path = "delta/retail/processed_data.parquet"
-        
-        logger.info(f"Downloading Parquet file from {container_name}/{blob_path}")
+        logger.info(f"Using Parquet file {container_name}/{blob_path}")
         blob_client = blob_service_client.get_blob_client(
             container=container_name,
             blob=blob_path
         )
-        blob_data = blob_client.download_blob()
-        with open("temp_processed_data.parquet", "wb") as temp_file:
-            temp_file.write(blob_data.readall())
+    
+    try:
+        # Stream the blob to the local cache unless an identical copy is already there
+        cache_dir = config.get("data", {}).get("cache_dir", "data/cache")
+        local_path = fetch_blob(blob_client, cache_dir, logger)
         
-        # Read Parquet into pandas DataFrame
-        logger.info("Reading Parquet into pandas DataFrame")
-        pandas_df = pd.read_parquet("temp_processed_data.parquet")
+        # Read only the requested columns into pandas DataFrame
+        logger.info(f"Reading Parquet into pandas DataFrame (columns: {columns or 'all'})")
+        pandas_df = read_parquet_columns(local_path, columns)
         logger.info("Dataset loaded successfully")
         return pandas_df
     
     except Exception as e:
         logger.error(f"Failed to load dataset: {str(e)}")
         raise
-    
-    finally:
-        # Clean up temporary file
-        temp_file_path = "temp_processed_data.parquet"
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-            logger.info(f"Cleaned up temporary file: {temp_file_path}")
 
-def train_pricing_model(config_path: str) -> None:
+# PPO defaults; override any of them (or other PPO kwargs) under model.ppo in config.yaml
+DEFAULT_PPO_CONFIG = {
+    "learning_rate": 5e-4,
+    "n_steps": 2048,  # Number of steps to run for each environment per update
+    "batch_size": 64,
+    "n_epochs": 10  # Number of epochs per update
+}
+
+def get_ppo_config(config: dict) -> dict:
+    """Merge model.ppo from config.yaml over the PPO defaults."""
+    return {**DEFAULT_PPO_CONFIG, **(config["model"].get("ppo") or {})}
+
+def get_total_timesteps(config: dict) -> int:
+    """Read model.total_timesteps, falling back to the legacy model.sac.training_iterations * 1000."""
+    model_config = config["model"]
+    if "total_timesteps" in model_config:
+        return int(model_config["total_timesteps"])
+    return model_config["sac"]["training_iterations"] * 1000  # Convert iterations to timesteps
+
+class ThroughputCallback(BaseCallback):
+    """Log env steps/sec per rollout and the time spent in each policy update."""
+    def __init__(self, logger):
+        super().__init__()
+        self.log = logger
+        self._rollout_start = None
+        self._rollout_steps = 0
+        self._update_start = None
+
+    def _on_rollout_start(self) -> None:
+        now = time.perf_counter()
+        if self._update_start is not None:
+            update_time = now - self._update_start
+            self.logger.record("throughput/update_time_s", update_time)
+            self.log.info(f"Policy update took {update_time:.2f}s")
+        self._rollout_start = now
+        self._rollout_steps = self.num_timesteps
+
+    def _on_rollout_end(self) -> None:
+        now = time.perf_counter()
+        steps = self.num_timesteps - self._rollout_steps
+        steps_per_sec = steps / max(now - self._rollout_start, 1e-9)
+        self.logger.record("throughput/env_steps_per_sec", steps_per_sec)
+        self.log.info(f"Rollout collected {steps} env steps at {steps_per_sec:.0f} steps/sec")
+        self._update_start = now
+
+    def _on_step(self) -> bool:
+        return True
+
+class CheckpointCallback(BaseCallback):
+    """Periodically save the model (policy, optimizer state and timestep counter) for resuming training.
+
+    Checkpoints are written between rollouts, after a completed policy update.
+    """
+    def __init__(self, checkpoint_dir: str, every_timesteps: int, run: dict, keep: int = 2, logger=None):
+        super().__init__()
+        self.checkpoint_dir = checkpoint_dir
+        self.every_timesteps = every_timesteps
+        self.run = run
+        self.keep = keep
+        self.log = logger
+        self._last_save = None
+
+    def _init_callback(self) -> None:
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self._last_save = self.num_timesteps
+
+    def _on_rollout_start(self) -> None:
+        if self.num_timesteps - self._last_save >= self.every_timesteps:
+            self.save()
+
+    def save(self) -> str:
+        path = os.path.join(self.checkpoint_dir, f"ppo_{self.num_timesteps}_steps.zip")
+        temp_path = os.path.join(self.checkpoint_dir, "_checkpoint.tmp.zip")
+        self.model.save(temp_path)
+        os.replace(temp_path, path)
+        # The manifest is written last, so it only ever names a complete checkpoint
+        write_checkpoint_manifest(self.checkpoint_dir, {**self.run, "path": path, "num_timesteps": self.num_timesteps})
+        for old_path in list_checkpoints(self.checkpoint_dir)[:-self.keep]:
+            os.remove(old_path)
+        self._last_save = self.num_timesteps
+        if self.log:
+            self.log.info(f"Saved checkpoint at {self.num_timesteps} timesteps to {path}")
+        return path
+
+    def _on_step(self) -> bool:
+        return True
+
+CHECKPOINT_MANIFEST = "checkpoint.json"
+
+def list_checkpoints(checkpoint_dir: str) -> list:
+    """Checkpoint files in checkpoint_dir, oldest first."""
+    if not os.path.isdir(checkpoint_dir):
+        return []
+    names = [name for name in os.listdir(checkpoint_dir) if name.startswith("ppo_") and name.endswith("_steps.zip")]
+    return [os.path.join(checkpoint_dir, name) for name in sorted(names, key=lambda name: int(name.split("_")[1]))]
+
+def write_checkpoint_manifest(checkpoint_dir: str, manifest: dict) -> None:
+    temp_path = os.path.join(checkpoint_dir, f"{CHECKPOINT_MANIFEST}.tmp")
+    with open(temp_path, "w") as file:
+        json.dump(manifest, file)
+    os.replace(temp_path, os.path.join(checkpoint_dir, CHECKPOINT_MANIFEST))
+
+def latest_checkpoint(checkpoint_dir: str, run: dict):
+    """Return the manifest of the newest checkpoint saved by the same kind of run, or None."""
+    manifest_path = os.path.join(checkpoint_dir, CHECKPOINT_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as file:
+        manifest = json.load(file)
+    # A checkpoint of a different run (e.g. fresh vs warm-start, other target) is not resumed
+    if any(manifest.get(key) != value for key, value in run.items()) or not os.path.exists(manifest["path"]):
+        return None
+    return manifest
+
+def clear_checkpoints(checkpoint_dir: str) -> None:
+    """Remove the checkpoints of a finished run so the next run starts over."""
+    for path in list_checkpoints(checkpoint_dir):
+        os.remove(path)
+    manifest_path = os.path.join(checkpoint_dir, CHECKPOINT_MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+def fit_policy(env, config: dict, logger, warm_start: bool = None, callbacks: list = None) -> PPO:
+    """Train PPO on env, resuming from the latest checkpoint of an interrupted run.
+
+    In warm-start mode the saved model is fine-tuned for model.warm_start.timesteps_fraction of
+    the configured timesteps instead of training a fresh policy.
+    """
+    model_config = config["model"]
+    checkpoint_config = model_config.get("checkpoint", {})
+    warm_config = model_config.get("warm_start", {})
+    if warm_start is None:
+        warm_start = warm_config.get("enabled", False)
+
+    ppo_config = get_ppo_config(config)
+    total_timesteps = get_total_timesteps(config)
+    if warm_start:
+        ppo_config["learning_rate"] = warm_config.get("learning_rate", ppo_config["learning_rate"])
+        total_timesteps = max(1, int(total_timesteps * warm_config.get("timesteps_fraction", 0.25)))
+    logger.info(f"PPO hyperparameters: {ppo_config}")
+
+    checkpoint_dir = checkpoint_config.get("dir", "models/checkpoints")
+    run = {"warm_start": bool(warm_start), "total_timesteps": total_timesteps}
+    checkpoint = latest_checkpoint(checkpoint_dir, run) if checkpoint_config.get("resume", True) else None
+    # Saved hyperparameters (and their pickled schedules) are replaced by the configured ones
+    custom_objects = {"lr_schedule": lambda _: 0.0, "clip_range": 0.2, **ppo_config}
+    if checkpoint is not None:
+        logger.info(f"Resuming training from {checkpoint['path']} at {checkpoint['num_timesteps']} timesteps")
+        model = PPO.load(checkpoint["path"], env=env, device="auto", custom_objects=custom_objects)
+    elif warm_start:
+        path = warm_config.get("path", "models/ppo_model.zip")
+        logger.info(f"Warm-starting from {path}")
+        model = PPO.load(path, env=env, device="auto", custom_objects=custom_objects)
+        # The fine-tuning run counts its own timesteps
+        model.num_timesteps = 0
+    else:
+        model = PPO(
+            policy="MlpPolicy",  # Use a multi-layer perceptron policy
+            env=env,
+            verbose=model_config.get("verbose", 1),  # Log training progress
+            device="auto",  # Automatically select CPU/GPU
+            seed=model_config.get("seed"),
+            **ppo_config
+        )
+
+    remaining = total_timesteps - model.num_timesteps
+    logger.info(f"Training PPO model for {remaining} of {total_timesteps} timesteps")
+    checkpoints = CheckpointCallback(
+        checkpoint_dir, checkpoint_config.get("every_timesteps", 10000), run,
+        keep=checkpoint_config.get("keep", 2), logger=logger
+    )
+    model.learn(
+        total_timesteps=remaining,
+        callback=[ThroughputCallback(logger), checkpoints] + (callbacks or []),
+        reset_num_timesteps=False
+    )
+    clear_checkpoints(checkpoint_dir)
+    return model
+
+def train_pricing_model(config_path: str, warm_start: bool = None) -> None:
     """Train PPO model for dynamic pricing using Stable Baselines3."""
     logger = setup_logger(config_path)
     logger.info("Starting pricing model training")
@@ -162,43 +334,56 @@ def train_pricing_model(config_path: str) -> None:
     with open(config_path, "r") as file:
         config = yaml.safe_load(file)
     
-    # Load dataset
-    dataset = load_dataset(config_path)
+    # Load only the columns the env needs
+    dataset = load_dataset(config_path, columns=SOURCE_COLUMNS)
     
-    # Initialize the environment
-    env = RetailPricingEnv(env_config={"dataset": dataset})
+    # Build the product feature matrix once and release the DataFrame
+    env_config = {"product_table": ProductTable.from_dataframe(dataset)}
+    del dataset
     
-    # Validate the environment
+    # Validate the single-product environment
     logger.info("Validating the environment")
-    check_env(env)
+    check_env(RetailPricingEnv(env_config=env_config))
     logger.info("Environment validation passed")
     
+    # Initialize the vectorized environment (N products stepped in lockstep),
+    # split across worker processes when model.n_workers > 1
+    model_config = config["model"]
+    n_envs = model_config.get("n_envs", 8)
+    n_workers = model_config.get("n_workers", 1)
+    seed = model_config.get("seed")
+    if n_workers > 1:
+        env = SharedMemVecEnv(env_config=env_config, num_envs=n_envs, n_workers=n_workers)
+    else:
+        env = VecRetailPricingEnv(env_config=env_config, num_envs=n_envs)
+    if seed is not None:
+        env.seed(seed)
+    logger.info(f"Using {n_envs} vectorized environments across {n_workers} worker(s)")
+    
     try:
-        # Initialize PPO model with Stable Baselines3
-        model = PPO(
-            policy="MlpPolicy",  # Use a multi-layer perceptron policy
-            env=env,
-            learning_rate=5e-4,
-            n_steps=2048,  # Number of steps to run for each environment per update
-            batch_size=64,
-            n_epochs=10,  # Number of epochs per update
-            verbose=1,  # Log training progress
-            device="auto"  # Automatically select CPU/GPU
-        )
-        
-        # Train the model
-        total_timesteps = config["model"]["sac"]["training_iterations"] * 1000  # Convert iterations to timesteps
-        logger.info(f"Training PPO model for {total_timesteps} timesteps")
-        model.learn(total_timesteps=total_timesteps)
+        # Train the model (fresh, resumed from a checkpoint, or warm-started)
+        model = fit_policy(env, config, logger, warm_start=warm_start)
         
         # Save the model
         os.makedirs("models", exist_ok=True)
         model.save("models/ppo_model")
+        export_policy(model, "models/ppo_policy.npz")
         logger.info("Model training completed and saved successfully")
     
     except Exception as e:
         logger.error(f"Training failed: {str(e)}")
         raise
+    
+    finally:
+        env.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the PPO pricing policy.")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--warm-start", action="store_true", default=None,
+                        help="Fine-tune the saved model instead of training from scratch (default: model.warm_start.enabled)")
+    args = parser.parse_args()
+    train_pricing_model(args.config, warm_start=args.warm_start)
 
 if __name__ == "__main__":
-    train_pricing_model("config/config.yaml")
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+import pandas as pd
+from src.preprocessing.features import INPUT_COLUMNS, FEATURE_NAMES, featurize_columns, feature_matrix
+
+# Raw columns the pricing envs read from the processed dataset
+SOURCE_COLUMNS = INPUT_COLUMNS
+
+# Columns of the product matrix; the last five are the env observation
+PRODUCT_COLUMNS = ["unit_price", "qty"] + FEATURE_NAMES
+UNIT_PRICE, QTY = 0, 1
+OBS_SLICE = slice(2, 7)
+
+class ProductTable:
+    """Compact float32 product feature matrix built once for the pricing envs."""
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    @classmethod
+    def from_dataframe(cls, dataset: pd.DataFrame) -> "ProductTable":
+        """Project the columns the env needs and compute features in one pass."""
+        features = featurize_columns(dataset)
+        matrix = np.empty((len(dataset), len(PRODUCT_COLUMNS)), dtype=np.float32)
+        matrix[:, UNIT_PRICE] = dataset["unit_price"].to_numpy(dtype=np.float64)
+        matrix[:, QTY] = dataset["qty"].to_numpy(dtype=np.float64)
+        matrix[:, OBS_SLICE] = feature_matrix(features)
+        return cls(matrix)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def sample(self, rng: np.random.Generator, size=None):
+        """Pick random row indices with the given NumPy generator."""
+        return rng.integers(0, len(self), size=size)
+
+def latest_rows(dataset: pd.DataFrame) -> pd.DataFrame:
+    """Keep the most recent row (by month_year, when present) of every product."""
+    latest = dataset
+    if "month_year" in dataset.columns:
+        period = pd.to_datetime(dataset["month_year"], format="%d-%m-%Y", errors="coerce")
+        latest = dataset.assign(_period=period).sort_values("_period", kind="stable").drop(columns="_period")
+    return latest.drop_duplicates(subset="product_id", keep="last")
+
+def get_product_table(env_config: dict) -> ProductTable:
+    """Return the shared product table from env_config, building it from the dataset if needed."""
+    table = env_config.get("product_table")
+    if table is None:
+        table = ProductTable.from_dataframe(env_config["dataset"])
+    return table
@@ -0,0 +1,214 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import yaml
+from src.preprocessing.features import INPUT_COLUMNS, featurize_columns, feature_matrix
+from src.utils.logger import setup_logger
+
+# Columns read per chunk; identifiers are carried through to the output
+READ_COLUMNS = ["product_id", "product_category_name"] + INPUT_COLUMNS
+
+MANIFEST_FILE = "_reprice_manifest.json"
+
+# Per-process engine, loaded once by the pool initializer
+_engine = None
+
+def open_dataset(input_path: str) -> ds.Dataset:
+    """Open a Parquet file, (hive-partitioned) directory or Delta table as a pyarrow dataset.
+
+    Delta tables are read from the files active in their log only; the directory also
+    holds files removed or overwritten by later commits.
+    """
+    if not os.path.isdir(os.path.join(input_path, "_delta_log")):
+        return ds.dataset(input_path, format="parquet", partitioning="hive")
+    try:
+        from deltalake import DeltaTable
+    except ImportError:
+        raise ValueError(f"{input_path} is a Delta table; install deltalake to reprice it")
+    files = [uri[len("file://"):] if uri.startswith("file://") else uri for uri in DeltaTable(input_path).file_uris()]
+    return ds.dataset(files, format="parquet", partitioning="hive", partition_base_dir=os.path.abspath(input_path))
+
+def list_chunks(input_path: str) -> list:
+    """Split the input (see open_dataset) into (file, row group, partition keys) chunks."""
+    dataset = open_dataset(input_path)
+    chunks = []
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        for row_group in range(fragment.metadata.num_row_groups):
+            chunks.append((fragment.path, row_group, keys))
+    return chunks
+
+def chunk_output_path(output_path: str, index: int) -> str:
+    return os.path.join(output_path, f"part-{index:05d}.parquet")
+
+def _init_worker(engine: str, config: dict) -> None:
+    global _engine
+    if engine == "elasticity":
+        from src.model.elasticity import ElasticityEngine
+        _engine = ElasticityEngine.from_config(config)
+    else:
+        from src.api.inference import load_policy
+        _engine = load_policy(config.get("model", {}).get("path", "models/ppo_policy.npz"))
+
+def score_columns(columns) -> dict:
+    """Featurize a chunk of columns and price it with the worker's engine."""
+    features = featurize_columns(columns)
+    result = {}
+    if hasattr(_engine, "recommend"):
+        recommendation = _engine.recommend(columns)
+        price_adjustment = recommendation["price_adjustment"]
+        result["elasticity"] = recommendation["elasticity"]
+    else:
+        actions, _ = _engine.predict(feature_matrix(features), deterministic=True)
+        price_adjustment = np.asarray(actions, dtype=np.float64).reshape(-1)
+    unit_price = np.asarray(columns["unit_price"], dtype=np.float64)
+    return {
+        "recommended_price": unit_price * (1 + price_adjustment),
+        "price_adjustment": price_adjustment,
+        **result,
+        **features
+    }
+
+def reprice_chunk(chunk: tuple, output_file: str, batch_size: int) -> int:
+    """Score one row group batch by batch and write its recommendations file; returns the row count."""
+    path, row_group, keys = chunk
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in READ_COLUMNS if name in parquet_file.schema_arrow.names]
+    # Underscore prefix keeps unfinished files out of dataset reads
+    temp_file = os.path.join(os.path.dirname(output_file), f"_{os.path.basename(output_file)}.tmp")
+    rows = 0
+    writer = None
+    try:
+        for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=[row_group], columns=columns):
+            table = pa.Table.from_batches([batch])
+            # Hive partition values are not stored in the files
+            for name, value in keys.items():
+                if name in READ_COLUMNS and name not in table.column_names:
+                    table = table.append_column(name, pa.array([value] * table.num_rows, pa.string()))
+            output = pa.table({
+                "product_id": table.column("product_id").cast(pa.string()),
+                "product_category_name": table.column("product_category_name").cast(pa.string()),
+                "unit_price": table.column("unit_price").cast(pa.float64()),
+                **score_columns({name: table.column(name).to_numpy() for name in READ_COLUMNS})
+            })
+            if writer is None:
+                writer = pq.ParquetWriter(temp_file, output.schema)
+            writer.write_table(output)
+            rows += output.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return 0
+    # The finished file marks the chunk as done for resumed runs
+    os.replace(temp_file, output_file)
+    return rows
+
+def _run_chunk(args: tuple) -> int:
+    return reprice_chunk(*args)
+
+def reprice_catalog(input_path: str, output_path: str, config: dict, engine: str = "rl", n_workers: int = None,
+                    batch_size: int = 65536, start_method: str = "spawn", logger=None) -> dict:
+    """Reprice every product in the Parquet input into a directory of recommendation files.
+
+    Chunks already written by an earlier run are skipped, so an interrupted run resumes.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = list_chunks(input_path)
+    os.makedirs(output_path, exist_ok=True)
+
+    # Progress only carries over when the run covers the same chunks with the same engine
+    manifest = {"engine": engine, "chunks": [[path, row_group] for path, row_group, _ in chunks]}
+    manifest_path = os.path.join(output_path, MANIFEST_FILE)
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as file:
+            previous = json.load(file)
+    if previous != manifest:
+        if previous is not None and logger:
+            logger.warning(f"Input or engine changed since the last run; discarding progress in {output_path}")
+        for name in os.listdir(output_path):
+            if name.startswith("part-"):
+                os.remove(os.path.join(output_path, name))
+        with open(manifest_path, "w") as file:
+            json.dump(manifest, file)
+
+    pending = [
+        (chunk, chunk_output_path(output_path, index), batch_size)
+        for index, chunk in enumerate(chunks)
+        if not os.path.exists(chunk_output_path(output_path, index))
+    ]
+    if logger:
+        logger.info(
+            f"Repricing {input_path} with the {engine} engine: {len(chunks)} chunks, "
+            f"{len(chunks) - len(pending)} already done, {n_workers} worker(s)"
+        )
+
+    start = time.perf_counter()
+    rows = 0
+    if n_workers == 1:
+        _init_worker(engine, config)
+        for args in pending:
+            rows += _run_chunk(args)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(engine, config)
+        ) as pool:
+            for done, chunk_rows in enumerate(pool.map(_run_chunk, pending), 1):
+                rows += chunk_rows
+                if logger:
+                    logger.info(f"Repriced chunk {done}/{len(pending)} ({rows} rows so far)")
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "chunks": len(chunks),
+        "skipped_chunks": len(chunks) - len(pending),
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0
+    }
+    if logger:
+        logger.info(f"Repriced {rows} rows in {seconds:.2f}s ({summary['rows_per_sec']:.0f} rows/sec)")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprice the full catalog from the processed Parquet dataset.")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--input", help="Processed Parquet file, directory or Delta table (default: ingestion.output_path)")
+    parser.add_argument("--output", help="Recommendations directory (default: reprice.output_path)")
+    parser.add_argument("--engine", choices=["rl", "elasticity"], help="Pricing engine (default: reprice.engine)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: reprice.n_workers or all cores)")
+    args = parser.parse_args()
+
+    logger = setup_logger(args.config)
+    with open(args.config, "r") as file:
+        config = yaml.safe_load(file)
+    reprice_config = config.get("reprice", {})
+    input_path = args.input or config.get("ingestion", {}).get("output_path", config["spark"]["delta_table"])
+
+    reprice_catalog(
+        input_path,
+        args.output or reprice_config.get("output_path", "data/recommendations"),
+        config,
+        engine=args.engine or reprice_config.get("engine", "rl"),
+        n_workers=args.workers or reprice_config.get("n_workers"),
+        batch_size=reprice_config.get("batch_size", 65536),
+        logger=logger
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import yaml
+from stable_baselines3.common.callbacks import BaseCallback
+from src.model.product_table import ProductTable, SOURCE_COLUMNS
+from src.utils.logger import setup_logger
+
+# Used when sweep.space is not configured: a list is a choice, a dict a (log-)uniform range
+DEFAULT_SPACE = {
+    "learning_rate": {"low": 1e-4, "high": 1e-3, "log": True},
+    "n_steps": [512, 1024, 2048],
+    "batch_size": [64, 128, 256],
+    "n_epochs": [5, 10]
+}
+
+# Per-process state, set once by the pool initializer
+_table = None
+_eval_matrix = None
+
+def sample_params(space: dict, rng: np.random.Generator) -> dict:
+    """Draw one hyperparameter set from the search space."""
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, dict):
+            low, high = float(spec["low"]), float(spec["high"])
+            if spec.get("log", False):
+                params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                params[name] = float(rng.uniform(low, high))
+        else:
+            value = spec[rng.integers(len(spec))]
+            params[name] = value.item() if isinstance(value, np.generic) else value
+    return params
+
+def suggest_trials(space: dict, n_trials: int, seed: int = 0) -> list:
+    """Return [(trial, seed, params), ...]; every trial gets its own seed derived from the sweep seed."""
+    rng = np.random.default_rng(seed)
+    return [(trial, seed + 1 + trial, sample_params(space, rng)) for trial in range(n_trials)]
+
+def value_at(curve: list, timesteps: int):
+    """A trial's latest reported reward at timesteps, or None if it has not got that far."""
+    if not curve or curve[-1][0] < timesteps:
+        return None
+    earlier = [reward for steps, reward in curve if steps <= timesteps]
+    return earlier[-1] if earlier else None
+
+def should_prune(value: float, timesteps: int, other_curves: list, quantile: float = 0.5, min_trials: int = 2) -> bool:
+    """Median-style rule: prune when the reward is below the quantile of other trials at the same timesteps."""
+    others = [other for other in (value_at(curve, timesteps) for curve in other_curves) if other is not None]
+    if len(others) < min_trials:
+        return False
+    return value < np.quantile(others, quantile)
+
+class PruningCallback(BaseCallback):
+    """Publish the trial's reward curve to the sweep directory and stop the trial when it lags the others."""
+    def __init__(self, progress_dir: str, trial: int, total_timesteps: int, warmup_fraction: float = 0.3,
+                 quantile: float = 0.5, min_trials: int = 2):
+        super().__init__()
+        self.progress_dir = progress_dir
+        self.trial = trial
+        self.total_timesteps = total_timesteps
+        self.warmup_fraction = warmup_fraction
+        self.quantile = quantile
+        self.min_trials = min_trials
+        self.curve = []
+        self.pruned = False
+
+    def _on_rollout_end(self) -> None:
+        # Mean per-step reward of the rollout just collected
+        reward = float(np.mean(self.model.rollout_buffer.rewards))
+        self.curve.append([self.num_timesteps, reward])
+        path = os.path.join(self.progress_dir, f"trial_{self.trial}.json")
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(self.curve, file)
+        os.replace(f"{path}.tmp", path)
+
+        if self.num_timesteps >= self.warmup_fraction * self.total_timesteps:
+            self.pruned = should_prune(reward, self.num_timesteps, self._other_curves(), self.quantile, self.min_trials)
+
+    def _other_curves(self) -> list:
+        curves = []
+        for name in os.listdir(self.progress_dir):
+            if name.endswith(".json") and name != f"trial_{self.trial}.json":
+                with open(os.path.join(self.progress_dir, name), "r") as file:
+                    curves.append(json.load(file))
+        return curves
+
+    def _on_step(self) -> bool:
+        return not self.pruned
+
+def _init_worker(table: ProductTable, eval_matrix: np.ndarray) -> None:
+    global _table, _eval_matrix
+    import torch
+    # Trials already fill the cores; more torch threads per process only oversubscribe them
+    torch.set_num_threads(1)
+    _table = table
+    _eval_matrix = eval_matrix
+
+def run_trial(trial: int, seed: int, params: dict, sweep_config: dict, model_config: dict, output_dir: str,
+              config_path: str = None) -> dict:
+    """Train one trial; returns its row of the results table."""
+    from src.model.evaluate import simulate
+    from src.model.pricing_model import fit_policy
+    from src.model.vec_env import VecRetailPricingEnv
+    logger = setup_logger(config_path) if config_path else logging.getLogger("DynamicPricing")
+
+    timesteps = int(sweep_config.get("timesteps", 50000))
+    trial_dir = os.path.join(output_dir, f"trial_{trial}")
+    # Configured model settings apply to every trial; only the swept keys differ
+    config = {"model": {
+        **model_config,
+        "total_timesteps": timesteps,
+        "seed": seed,
+        "verbose": 0,
+        "ppo": {**(model_config.get("ppo") or {}), **params},
+        "checkpoint": {"dir": os.path.join(trial_dir, "checkpoints"), "resume": False, "every_timesteps": timesteps + 1}
+    }}
+    prune_config = sweep_config.get("prune", {})
+    pruner = PruningCallback(
+        os.path.join(output_dir, "progress"), trial, timesteps,
+        warmup_fraction=prune_config.get("warmup_fraction", 0.3),
+        quantile=prune_config.get("quantile", 0.5),
+        min_trials=prune_config.get("min_trials", 2)
+    )
+    row = {"trial": trial, "seed": seed, **params}
+
+    start = time.perf_counter()
+    env = VecRetailPricingEnv(env_config={"product_table": _table}, num_envs=model_config.get("n_envs", 8))
+    # Every trial sees the same product sequence, so reward curves are comparable
+    env.seed(sweep_config.get("env_seed", sweep_config.get("seed", 0)))
+    try:
+        callbacks = [pruner] if prune_config.get("enabled", True) else []
+        model = fit_policy(env, config, logger, warm_start=False, callbacks=callbacks)
+        row["status"] = "pruned" if pruner.pruned else "complete"
+        row["timesteps"] = model.num_timesteps
+        row["final_reward"] = pruner.curve[-1][1] if pruner.curve else np.nan
+        row["score"] = np.nan
+        if not pruner.pruned:
+            # Mean episode profit per product on the shared evaluation sample
+            profit, _ = simulate(model, _eval_matrix, sweep_config.get("eval_steps", 100))
+            row["score"] = float(profit.mean())
+            model.save(os.path.join(trial_dir, "ppo_model"))
+    except Exception as e:
+        logger.error(f"Trial {trial} failed: {str(e)}")
+        row.update({"status": "failed", "timesteps": 0, "final_reward": np.nan, "score": np.nan})
+    finally:
+        env.close()
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+def _run_trial(args: tuple) -> dict:
+    return run_trial(*args)
+
+def eval_sample(table: ProductTable, sweep_config: dict) -> np.ndarray:
+    """The fixed sample of product rows that trials (and the production model) are scored on."""
+    rng = np.random.default_rng(sweep_config.get("seed", 0))
+    rows = rng.choice(len(table), size=min(len(table), sweep_config.get("eval_products", 5000)), replace=False)
+    return table.matrix[np.sort(rows)]
+
+def run_sweep(table: ProductTable, config: dict, output_dir: str, n_workers: int = None, start_method: str = "spawn",
+              config_path: str = None, logger=None) -> pd.DataFrame:
+    """Run the sweep in a process pool and write results.csv (best trial first) to output_dir."""
+    sweep_config = config.get("sweep", {})
+    model_config = config.get("model", {})
+    trials = suggest_trials(sweep_config.get("space", DEFAULT_SPACE), sweep_config.get("n_trials", 8),
+                            sweep_config.get("seed", 0))
+    n_workers = min(n_workers or sweep_config.get("n_workers") or os.cpu_count() or 1, len(trials))
+
+    # Reward curves of an earlier sweep must not prune this one
+    shutil.rmtree(os.path.join(output_dir, "progress"), ignore_errors=True)
+    os.makedirs(os.path.join(output_dir, "progress"))
+
+    eval_matrix = eval_sample(table, sweep_config)
+
+    if logger:
+        logger.info(f"Running {len(trials)} sweep trials with {n_workers} worker(s) into {output_dir}")
+    rows = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp.get_context(start_method),
+        initializer=_init_worker,
+        initargs=(table, eval_matrix)
+    ) as pool:
+        futures = {
+            pool.submit(_run_trial, (trial, seed, params, sweep_config, model_config, output_dir, config_path)):
+                (trial, seed, params)
+            for trial, seed, params in trials
+        }
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except Exception as e:
+                # A crashed worker (BrokenProcessPool) fails its trials, not the whole sweep
+                trial, seed, params = futures[future]
+                if logger:
+                    logger.error(f"Trial {trial} failed in its worker process: {str(e)}")
+                row = {"trial": trial, "seed": seed, **params, "status": "failed", "timesteps": 0,
+                       "final_reward": np.nan, "score": np.nan, "seconds": np.nan}
+            rows.append(row)
+            if logger:
+                logger.info(f"Trial {row['trial']} {row['status']} (score {row['score']:.2f}, {row['seconds']:.1f}s)")
+
+    results = pd.DataFrame(rows).sort_values(["score", "trial"], ascending=[False, True], na_position="last")
+    results.to_csv(os.path.join(output_dir, "results.csv"), index=False)
+    if logger:
+        logger.info(f"Sweep finished in {time.perf_counter() - start:.1f}s:\n{results.to_string(index=False)}")
+    return results
+
+def promote_best(results: pd.DataFrame, output_dir: str, eval_matrix: np.ndarray, config: dict,
+                 model_path: str = "models/ppo_model.zip", policy_path: str = "models/ppo_policy.npz", logger=None):
+    """Copy the best completed trial's model over the serving model and re-export its policy.
+
+    The trial is only promoted when it beats the current model at model_path on the same
+    evaluation sample and passes the evaluation.gate_baseline check, if one is configured.
+    """
+    from src.api.inference import load_policy
+    from src.model.evaluate import DEFAULT_BASELINES, ConstantPolicy, simulate
+    from src.model.numpy_policy import export_policy
+    completed = results[results["status"] == "complete"]
+    if completed.empty:
+        if logger:
+            logger.warning("No sweep trial completed; nothing to promote")
+        return None
+    best = completed.iloc[0]
+    trial = int(best["trial"])
+    score = float(best["score"])
+    eval_steps = config.get("sweep", {}).get("eval_steps", 100)
+
+    if os.path.exists(model_path):
+        production, _ = simulate(load_policy(model_path), eval_matrix, eval_steps)
+        if score <= production.mean():
+            if logger:
+                logger.warning(
+                    f"Best trial {trial} (score {score:.2f}) does not beat {model_path} "
+                    f"(score {production.mean():.2f}); not promoting"
+                )
+            return None
+
+    eval_config = config.get("evaluation", {})
+    baseline = eval_config.get("gate_baseline")
+    if baseline:
+        adjustment = eval_config.get("baselines", DEFAULT_BASELINES)[baseline]
+        baseline_profit, _ = simulate(ConstantPolicy(float(adjustment)), eval_matrix, eval_steps)
+        if score < eval_config.get("min_profit_ratio", 1.0) * baseline_profit.mean():
+            if logger:
+                logger.warning(f"Best trial {trial} does not beat the {baseline} baseline; not promoting")
+            return None
+
+    temp_path = f"{model_path}.tmp"
+    shutil.copyfile(os.path.join(output_dir, f"trial_{trial}", "ppo_model.zip"), temp_path)
+    os.replace(temp_path, model_path)
+    export_policy(model_path, policy_path)
+    with open(os.path.join(output_dir, "best.json"), "w") as file:
+        json.dump({key: (value.item() if isinstance(value, np.generic) else value) for key, value in best.items()},
+                  file, indent=2)
+    if logger:
+        logger.info(f"Promoted trial {trial} (score {score:.2f}) to {model_path} and {policy_path}")
+    return trial
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parallel PPO hyperparameter sweep.")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--workers", type=int, help="Concurrent trials (default: sweep.n_workers or all cores)")
+    parser.add_argument("--no-promote", action="store_true", help="Do not replace the serving model with the best trial")
+    args = parser.parse_args()
+
+    logger = setup_logger(args.config)
+    with open(args.config, "r") as file:
+        config = yaml.safe_load(file)
+    sweep_config = config.get("sweep", {})
+    output_dir = sweep_config.get("output_dir", "models/sweep")
+
+    from src.model.pricing_model import load_dataset
+    table = ProductTable.from_dataframe(load_dataset(args.config, columns=SOURCE_COLUMNS))
+    results = run_sweep(table, config, output_dir, n_workers=args.workers, config_path=args.config, logger=logger)
+    if sweep_config.get("promote", True) and not args.no_promote:
+        promote_best(results, output_dir, eval_sample(table, sweep_config), config, logger=logger)
+
+if __name__ == "__main__":
+    main()
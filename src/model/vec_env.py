@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from gymnasium.spaces import Box
+from stable_baselines3.common.vec_env import VecEnv
+from src.model.product_table import get_product_table, UNIT_PRICE, QTY, OBS_SLICE
+
+# State: [price_gap, normalized_price, demand_signal, price_trend, product_score]
+OBS_DIM = 5
+MAX_STEPS = 100
+
+def step_prices(unit_price: np.ndarray, qty: np.ndarray, price_adjustment: np.ndarray):
+    """Apply one step of price adjustments to arrays of products; returns (unit_price, qty, profit)."""
+    # Apply price adjustment directly
+    unit_price = unit_price * (1 + price_adjustment)
+
+    # Simulate demand response (higher price reduces qty)
+    demand_factor = 1 - (price_adjustment * 0.5)
+    qty = np.maximum(1, np.floor(qty * demand_factor))
+
+    # Calculate reward (profit: qty * (unit_price - cost)), assume 70% cost
+    cost = unit_price * 0.7
+    return unit_price, qty, qty * (unit_price - cost)
+
+class VecRetailPricingEnv(VecEnv):
+    """Vectorized retail pricing environment advancing N products in lockstep."""
+    def __init__(self, env_config: dict, num_envs: int = 8):
+        # Same spaces as RetailPricingEnv
+        observation_space = Box(low=-np.inf, high=np.inf, shape=(OBS_DIM,), dtype=np.float32)
+        action_space = Box(low=-0.1, high=0.1, shape=(1,), dtype=np.float32)
+        self.render_mode = None
+
+        # Compact product feature matrix shared with RetailPricingEnv
+        self.product_table = get_product_table(env_config)
+        self.max_steps = env_config.get("max_steps", MAX_STEPS)
+
+        # Per-env simulation state
+        self.unit_price = np.zeros(num_envs, dtype=np.float64)
+        self.qty = np.zeros(num_envs, dtype=np.float64)
+        self.step_count = np.zeros(num_envs, dtype=np.int64)
+        self.current_state = np.zeros((num_envs, OBS_DIM), dtype=np.float32)
+        self.np_random = np.random.default_rng()
+        self._actions = None
+
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _sample_products(self, env_idx: np.ndarray) -> None:
+        """Sample a random product for each env in env_idx."""
+        rows = self.product_table.matrix[self.product_table.sample(self.np_random, size=len(env_idx))]
+        self.unit_price[env_idx] = rows[:, UNIT_PRICE]
+        self.qty[env_idx] = rows[:, QTY]
+        self.step_count[env_idx] = 0
+        # Features are precomputed (same as preprocess.py)
+        self.current_state[env_idx] = rows[:, OBS_SLICE]
+
+    def reset(self) -> np.ndarray:
+        """Reset all environments with new products."""
+        if self._seeds[0] is not None:
+            self.np_random = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._sample_products(np.arange(self.num_envs))
+        return self.current_state.copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = actions
+
+    def step_wait(self):
+        """Advance every environment by one step."""
+        price_adjustment = np.asarray(self._actions, dtype=np.float64).reshape(self.num_envs)
+        self.unit_price, self.qty, rewards = step_prices(self.unit_price, self.qty, price_adjustment)
+        self.current_state[:, 1] = self.unit_price / 1000.0
+        self.current_state[:, 2] = self.qty / 1000.0
+        rewards = rewards.astype(np.float32)
+
+        self.step_count += 1
+        dones = self.step_count >= self.max_steps
+        obs = self.current_state.copy()
+        infos = [{} for _ in range(self.num_envs)]
+
+        # Auto-reset finished envs, keeping the terminal observation as SB3 expects
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            for i in done_idx:
+                infos[i]["terminal_observation"] = obs[i]
+                infos[i]["TimeLimit.truncated"] = False
+            self._sample_products(done_idx)
+            obs[done_idx] = self.current_state[done_idx]
+        return obs, rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def _indices(self, indices) -> list:
+        if indices is None:
+            return list(range(self.num_envs))
+        if isinstance(indices, int):
+            return [indices]
+        return list(indices)
+
+    def get_attr(self, attr_name: str, indices=None) -> list:
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> list:
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list:
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+
+MAX_PRICE = 1000.0  # Assume max price = 1000
+MAX_QTY = 1000.0  # Assume max qty = 1000
+
+# Raw columns the features are computed from
+INPUT_COLUMNS = ["unit_price", "qty", "comp_1", "comp_2", "comp_3", "lag_price", "product_score"]
+# Feature order of the RetailPricingEnv observation
+FEATURE_NAMES = ["price_gap", "normalized_price", "demand_signal", "price_trend", "product_score"]
+
+def compute_features(unit_price, comp_1, comp_2, comp_3, qty, lag_price, product_score) -> dict:
+    """Compute pricing features; works on scalars, NumPy arrays and pandas Series alike."""
+    avg_comp_price = (comp_1 + comp_2 + comp_3) / 3
+    return {
+        "price_gap": unit_price - avg_comp_price,
+        "normalized_price": unit_price / MAX_PRICE,
+        "demand_signal": qty / MAX_QTY,
+        "price_trend": unit_price - lag_price,
+        "product_score": product_score
+    }
+
+def featurize_row(row) -> dict:
+    """Compute features for a single record (Pydantic model or any object with the input attributes)."""
+    return compute_features(row.unit_price, row.comp_1, row.comp_2, row.comp_3, row.qty, row.lag_price, row.product_score)
+
+def featurize_columns(columns) -> dict:
+    """Compute features over whole columns of a dict of arrays, pandas DataFrame or Arrow table."""
+    arrays = {name: np.asarray(columns[name], dtype=np.float64) for name in INPUT_COLUMNS}
+    return compute_features(**arrays)
+
+def feature_matrix(features: dict, dtype=np.float32) -> np.ndarray:
+    """Stack batch features into an (N, 5) observation matrix in env order."""
+    return np.column_stack([np.asarray(features[name], dtype=dtype) for name in FEATURE_NAMES])
+
+def build_observation(features: dict) -> np.ndarray:
+    """Build the 5-feature env observation for one product."""
+    return np.array([features[name] for name in FEATURE_NAMES], dtype=np.float32)
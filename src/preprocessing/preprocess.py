@@ -4,11 +4,13 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from fastapi import FastAPI
 from pydantic import BaseModel
-import pandas as pd
 import yaml
 from src.utils.logger import setup_logger
+from src.utils.metrics import MetricsMiddleware, STAGES, metrics_response, observe_validation
+from src.preprocessing.features import featurize_row
 
 app = FastAPI()
+app.add_middleware(MetricsMiddleware)
 logger = setup_logger("config/config.yaml")
 
 class RetailData(BaseModel):
@@ -26,25 +28,14 @@ class RetailData(BaseModel):
 @app.post("/preprocess")
 async def preprocess(data: RetailData):
     """Preprocess retail data for pricing model."""
-    logger.info(f"Preprocessing data for product: {data.product_id}")
+    observe_validation()
+    logger.info("Preprocessing data for product: %s", data.product_id)
     
     try:
-        # Feature engineering
-        avg_comp_price = (data.comp_1 + data.comp_2 + data.comp_3) / 3
-        price_gap = data.unit_price - avg_comp_price
-        normalized_price = data.unit_price / 1000.0  # Assume max price = 1000
-        demand_signal = data.qty / 1000.0  # Assume max qty = 1000
-        price_trend = data.unit_price - data.lag_price
-        
-        features = {
-            "product_id": data.product_id,
-            "price_gap": price_gap,
-            "normalized_price": normalized_price,
-            "demand_signal": demand_signal,
-            "price_trend": price_trend,
-            "product_category_name": data.product_category_name,
-            "product_score": data.product_score
-        }
+        # Feature engineering (shared with the training env and batch API)
+        features = {"product_id": data.product_id, "product_category_name": data.product_category_name}
+        with STAGES["features"].time():
+            features.update(featurize_row(data))
         logger.info("Preprocessing completed successfully")
         return features
     
@@ -52,6 +43,11 @@ async def preprocess(data: RetailData):
         logger.error(f"Preprocessing failed: {str(e)}")
         raise
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    return metrics_response()
+
 if __name__ == "__main__":
     import uvicorn
     with open("config/config.yaml", "r") as file:
@@ -1,30 +1,55 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
 import yaml
 import os
 
+_lock = threading.Lock()
+_listener = None
+_configured_pid = None
+
 def setup_logger(config_path: str) -> logging.Logger:
-    """Set up logging based on config file."""
-    with open(config_path, "r") as file:
-        config = yaml.safe_load(file)
-    
-    log_level = getattr(logging, config["logging"]["level"], logging.INFO)
-    log_file = config["logging"]["file"]
-    
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    
+    """Set up logging based on config file, once per process.
+
+    Records go through a QueueHandler; a QueueListener thread writes them to the
+    file and console so log I/O stays off the request path.
+    """
+    global _listener, _configured_pid
     logger = logging.getLogger("DynamicPricing")
-    logger.setLevel(log_level)
-    
-    file_handler = logging.FileHandler(log_file)
-    stream_handler = logging.StreamHandler()
-    
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-    stream_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
-    
-    return logger
\ No newline at end of file
+    with _lock:
+        if _configured_pid == os.getpid():
+            return logger
+
+        with open(config_path, "r") as file:
+            config = yaml.safe_load(file)
+
+        log_level = getattr(logging, config["logging"]["level"], logging.INFO)
+        log_file = config["logging"]["file"]
+
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        logger.setLevel(log_level)
+
+        file_handler = logging.FileHandler(log_file)
+        stream_handler = logging.StreamHandler()
+
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+
+        # Drop handlers inherited from a parent process (e.g. after fork)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _configured_pid = os.getpid()
+
+    return logger
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import contextvars
+import time
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Sub-millisecond buckets for feature/inference work, up to tens of seconds for LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    "pricing_stage_latency_seconds", "Latency of one request stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+REQUEST_LATENCY = Histogram(
+    "pricing_request_latency_seconds", "End-to-end request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge("pricing_requests_in_flight", "Requests currently being handled", ["endpoint"])
+ERRORS = Counter("pricing_request_errors_total", "Requests answered with a 4xx/5xx status", ["endpoint", "status"])
+
+# Label children are resolved once; observing them is a lock and an add
+STAGES = {stage: STAGE_LATENCY.labels(stage) for stage in ("validation", "features", "inference", "llm")}
+
+_request_start = contextvars.ContextVar("request_start", default=None)
+
+def observe_validation() -> None:
+    """Record the time from request arrival to handler entry (body parsing and validation), once per request."""
+    start = _request_start.get()
+    if start is not None:
+        STAGES["validation"].observe(time.perf_counter() - start)
+        _request_start.set(None)
+
+class MetricsMiddleware:
+    """ASGI middleware tracking in-flight requests, latency and error statuses per endpoint."""
+    def __init__(self, app):
+        self.app = app
+        self.paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        if self.paths is None:
+            self.paths = {route.path for route in scope["app"].routes}
+        # Unknown paths share one label so scanners can't blow up label cardinality
+        endpoint = scope["path"] if scope["path"] in self.paths else "other"
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        token = _request_start.set(start)
+        in_flight = IN_FLIGHT.labels(endpoint)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+            if status >= 400:
+                ERRORS.labels(endpoint, str(status)).inc()
+            _request_start.reset(token)
+
+class InsightsCacheCollector:
+    """Expose insights cache counters and hit ratio, read from the caches at scrape time."""
+    def __init__(self):
+        self.caches = []
+
+    def collect(self):
+        stats = [cache.stats() for cache in self.caches]
+        hits = sum(s["hits"] for s in stats)
+        misses = sum(s["misses"] for s in stats)
+        yield CounterMetricFamily("insights_cache_hits", "Insights cache hits", value=hits)
+        yield CounterMetricFamily("insights_cache_misses", "Insights cache misses", value=misses)
+        yield GaugeMetricFamily(
+            "insights_cache_hit_ratio", "Insights cache hits over lookups",
+            value=hits / (hits + misses) if hits + misses else 0.0
+        )
+        yield GaugeMetricFamily("insights_cache_entries", "Entries held in memory", value=sum(s["size"] for s in stats))
+
+_cache_collector = InsightsCacheCollector()
+REGISTRY.register(_cache_collector)
+
+def register_insights_cache(cache) -> None:
+    """Include an InsightsCache in the exported cache metrics."""
+    _cache_collector.caches.append(cache)
+
+def metrics_response() -> Response:
+    """Render the default registry in the Prometheus text format."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
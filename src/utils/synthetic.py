@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+import pandas as pd
+
+SOURCE_CSV = Path(__file__).parent.parent.parent / "data" / "retail_data.csv"
+
+def synthetic_retail_data(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Generate rows with the retail_data.csv schema by resampling real rows with price noise."""
+    rng = np.random.default_rng(seed)
+    source = pd.read_csv(SOURCE_CSV)
+    data = source.iloc[rng.integers(0, len(source), size=n_rows)].reset_index(drop=True)
+
+    data["product_id"] = data["product_id"] + "_" + (np.arange(n_rows) % 10000).astype(str)
+    noise = rng.normal(1.0, 0.05, size=n_rows)
+    for column in ["unit_price", "comp_1", "comp_2", "comp_3", "lag_price"]:
+        data[column] = (data[column] * noise).round(2)
+    data["qty"] = np.maximum(1, (data["qty"] * rng.normal(1.0, 0.1, size=n_rows)).astype(np.int64))
+    data["total_price"] = (data["unit_price"] * data["qty"]).round(2)
+    return data
+
+def write_synthetic_csv(path: str, n_rows: int, chunk_rows: int = 500_000, seed: int = 0) -> str:
+    """Write a synthetic CSV in chunks so millions of rows don't need to fit in memory."""
+    written = 0
+    chunk_index = 0
+    while written < n_rows:
+        rows = min(chunk_rows, n_rows - written)
+        chunk = synthetic_retail_data(rows, seed=seed + chunk_index)
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += rows
+        chunk_index += 1
+    return path
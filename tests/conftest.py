@@ -0,0 +1,9 @@
+import shutil
+from pathlib import Path
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+def pytest_configure(config):
+    # The services read config/config.yaml at import time; fall back to the documented example
+    if not (CONFIG_DIR / "config.yaml").exists():
+        shutil.copyfile(CONFIG_DIR / "config.example.yaml", CONFIG_DIR / "config.yaml")
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import numpy as np
+import pyarrow as pa
+from fastapi.testclient import TestClient
+from src.api import serve
+from src.api.batch import ARROW_STREAM
+from src.api.inference import PolicyBatcher
+
+ITEMS = [
+    {"product_id": "a", "unit_price": 100.0, "comp_1": 95.0, "comp_2": 97.0, "comp_3": 93.0, "qty": 50,
+     "product_category_name": "toys", "product_score": 4.5, "volume": 100.0, "lag_price": 98.0},
+    {"product_id": "b", "unit_price": 40.0, "comp_1": 45.0, "comp_2": 44.0, "comp_3": 43.0, "qty": 7,
+     "product_category_name": "garden_tools", "product_score": 3.9, "volume": 10.0, "lag_price": 41.0}
+]
+COLUMNS = {name: [item[name] for item in ITEMS] for name in ITEMS[0]}
+
+class ConstantPolicy:
+    def predict(self, observations, deterministic=True):
+        return np.full((len(observations), 1), 0.05, dtype=np.float32), None
+
+def _client() -> TestClient:
+    serve.app.state.policy = PolicyBatcher(ConstantPolicy())
+    return TestClient(serve.app)
+
+def _arrow(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def test_json_records_and_columns():
+    client = _client()
+    records = client.post("/predict_price/batch", json=ITEMS).json()
+    assert [record["product_id"] for record in records] == ["a", "b"]
+    assert abs(records[1]["recommended_price"] - 42.0) < 1e-4
+    assert records[0]["features"]["price_gap"] == 5.0 and records[1]["features"]["product_category_name"] == "garden_tools"
+
+    columns = client.post("/predict_price/batch", json=COLUMNS).json()
+    assert columns["product_id"] == ["a", "b"]
+    np.testing.assert_allclose(columns["recommended_price"], [r["recommended_price"] for r in records])
+
+def test_arrow_round_trip():
+    response = _client().post(
+        "/predict_price/batch", content=_arrow(pa.table(COLUMNS)), headers={"content-type": ARROW_STREAM}
+    )
+    assert response.status_code == 200 and response.headers["content-type"] == ARROW_STREAM
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("product_id").to_pylist() == ["a", "b"]
+    np.testing.assert_allclose(table.column("recommended_price").to_numpy(), [105.0, 42.0], rtol=1e-6)
+
+def test_malformed_bodies_are_rejected():
+    client = _client()
+    response = client.post("/predict_price/batch", content=b"not arrow", headers={"content-type": ARROW_STREAM})
+    assert response.status_code == 400
+    assert client.post("/predict_price/batch", content=b"{", headers={"content-type": "application/json"}).status_code == 400
+    assert client.post("/predict_price/batch", json=[{"product_id": "a"}]).status_code == 422
+
+def test_empty_batches_are_rejected():
+    client = _client()
+    assert client.post("/predict_price/batch", json=[]).status_code == 422
+    assert client.post("/predict_price/batch", json={name: [] for name in COLUMNS}).status_code == 422
+    empty = pa.table(COLUMNS).slice(0, 0)
+    response = client.post("/predict_price/batch", content=_arrow(empty), headers={"content-type": ARROW_STREAM})
+    assert response.status_code == 422
+
+def test_missing_and_non_finite_values_are_rejected():
+    client = _client()
+    items = [dict(ITEMS[0]), dict(ITEMS[1], comp_2=None)]
+    response = client.post("/predict_price/batch", json=items)
+    assert response.status_code == 422 and "comp_2" in response.json()["detail"]
+    body = json.dumps(dict(COLUMNS, qty=[50, float("nan")]))
+    assert client.post("/predict_price/batch", content=body, headers={"content-type": "application/json"}).status_code == 422
+    table = pa.table(dict(COLUMNS, unit_price=pa.array([100.0, None])))
+    response = client.post("/predict_price/batch", content=_arrow(table), headers={"content-type": ARROW_STREAM})
+    assert response.status_code == 422
+
+def test_batch_is_scored_off_the_event_loop():
+    on_loop = []
+
+    class RecordingPolicy(ConstantPolicy):
+        def predict(self, observations, deterministic=True):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().predict(observations, deterministic)
+
+    client = TestClient(serve.app)
+    serve.app.state.policy = PolicyBatcher(RecordingPolicy())
+    assert client.post("/predict_price/batch", json=ITEMS).status_code == 200
+    assert on_loop == [False]
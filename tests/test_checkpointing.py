@@ -0,0 +1,54 @@
+import logging
+import pytest
+from src.utils.synthetic import synthetic_retail_data
+from src.model.pricing_model import fit_policy, list_checkpoints, latest_checkpoint
+from src.model.product_table import ProductTable
+from src.model.vec_env import VecRetailPricingEnv
+
+logger = logging.getLogger("test_checkpointing")
+
+class CountingEnv(VecRetailPricingEnv):
+    """Counts env steps and can crash after a given number of them."""
+    def __init__(self, env_config: dict, num_envs: int = 2, crash_after: int = None):
+        super().__init__(env_config, num_envs=num_envs)
+        self.steps = 0
+        self.crash_after = crash_after
+
+    def step_wait(self):
+        self.steps += self.num_envs
+        if self.crash_after is not None and self.steps > self.crash_after:
+            raise RuntimeError("simulated crash")
+        return super().step_wait()
+
+def _config(tmp_path, **model):
+    return {"model": {
+        "total_timesteps": 256,
+        "ppo": {"n_steps": 32, "batch_size": 32, "n_epochs": 1},
+        "checkpoint": {"dir": str(tmp_path / "checkpoints"), "every_timesteps": 64},
+        **model
+    }}
+
+def test_resume_and_warm_start(tmp_path):
+    env_config = {"product_table": ProductTable.from_dataframe(synthetic_retail_data(50, seed=2))}
+    config = _config(tmp_path)
+
+    # Crash in the fourth rollout; the last checkpoint is after the third update
+    with pytest.raises(RuntimeError):
+        fit_policy(CountingEnv(env_config, crash_after=200), config, logger)
+    checkpoint = latest_checkpoint(config["model"]["checkpoint"]["dir"], {"warm_start": False, "total_timesteps": 256})
+    assert checkpoint["num_timesteps"] == 192
+    assert len(list_checkpoints(config["model"]["checkpoint"]["dir"])) == 2
+
+    env = CountingEnv(env_config)
+    model = fit_policy(env, config, logger)
+    assert env.steps == 64 and model.num_timesteps == 256
+    # A finished run leaves nothing to resume
+    assert list_checkpoints(config["model"]["checkpoint"]["dir"]) == []
+
+    path = str(tmp_path / "ppo_model")
+    model.save(path)
+    warm_config = _config(tmp_path, warm_start={"path": f"{path}.zip", "timesteps_fraction": 0.5, "learning_rate": 1e-4})
+    env = CountingEnv(env_config)
+    warm = fit_policy(env, warm_config, logger, warm_start=True)
+    assert env.steps == 128 and warm.num_timesteps == 128
+    assert warm.policy.optimizer.param_groups[0]["lr"] == pytest.approx(1e-4)
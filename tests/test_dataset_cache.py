@@ -0,0 +1,17 @@
+import pandas as pd
+from src.model.dataset_cache import LocalBlobClient, fetch_blob, read_parquet_columns
+
+def test_fetch_blob_is_cached_and_projected(tmp_path):
+    source = tmp_path / "processed_data.parquet"
+    pd.DataFrame({"unit_price": [10.0, 20.0], "qty": [1, 2], "unused": ["a", "b"]}).to_parquet(source)
+    blob_client = LocalBlobClient(str(source), chunk_size=64)
+
+    cache_dir = str(tmp_path / "cache")
+    first = fetch_blob(blob_client, cache_dir)
+    second = fetch_blob(blob_client, cache_dir)
+    assert first == second
+    assert blob_client.download_count == 1
+
+    df = read_parquet_columns(first, ["unit_price", "qty"])
+    assert list(df.columns) == ["unit_price", "qty"]
+    assert df["unit_price"].tolist() == [10.0, 20.0]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import serve
+from src.model.elasticity import ElasticityEngine, ElasticityIndex, fit_elasticities, optimize_prices
+
+def _history(elasticities: dict, months: int = 12) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = []
+    for product_id, elasticity in elasticities.items():
+        price = 50.0 * np.exp(rng.normal(0, 0.2, months))
+        comp = 50.0 * np.exp(rng.normal(0, 0.2, months))
+        qty = 200.0 * price ** elasticity / 50.0 ** elasticity * (comp / 50.0) ** 0.5
+        rows.append(pd.DataFrame({
+            "product_id": product_id, "product_category_name": "garden_tools",
+            "unit_price": price, "qty": qty, "comp_1": comp, "comp_2": comp, "comp_3": comp
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+def test_fit_recovers_elasticities_with_fallbacks(tmp_path):
+    index = fit_elasticities(_history({"a": -1.5, "b": -3.0}))
+    np.testing.assert_allclose(index.lookup(["a", "b"], ["garden_tools"] * 2), [-1.5, -3.0], atol=1e-6)
+
+    # Unknown products use their category, unknown categories the global fit
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = ElasticityIndex.load(path)
+    category, unknown = loaded.lookup(["new", "new"], ["garden_tools", "toys"])
+    assert -3.0 < category < -1.5 and unknown == loaded.global_elasticity
+
+def test_candidate_search_matches_closed_form():
+    # Constant elasticity optimum is cost * e / (1 + e): +5% for e=-3, beyond both bounds otherwise
+    adjustment, expected_qty, profit = optimize_prices(
+        [100.0, 100.0, 100.0], [10, 10, 10], [-3.0, -1.2, -5.0], cost_ratio=0.7, max_change=0.1, n_candidates=41
+    )
+    np.testing.assert_allclose(adjustment, [0.05, 0.1, -0.1])
+    assert expected_qty[0] < 10 < expected_qty[2]
+    assert np.all(profit > 0)
+
+def test_api_selects_elasticity_engine():
+    serve.app.state.elasticity = ElasticityEngine(fit_elasticities(_history({"a": -3.0})))
+    client = TestClient(serve.app)
+    request = {
+        "product_id": "a", "unit_price": 100.0, "comp_1": 95.0, "comp_2": 97.0, "comp_3": 93.0, "qty": 50,
+        "product_category_name": "garden_tools", "product_score": 4.5, "volume": 100.0, "lag_price": 98.0,
+        "engine": "elasticity"
+    }
+    response = client.post("/predict_price", json=request).json()
+    assert response["engine"] == "elasticity" and abs(response["recommended_price"] - 105.0) < 1e-6
+
+    columns = {name: [value] for name, value in request.items() if name != "engine"}
+    batch = client.post("/predict_price/batch?engine=elasticity", json=columns).json()
+    assert abs(batch["recommended_price"][0] - 105.0) < 1e-6 and abs(batch["elasticity"][0] + 3.0) < 1e-6
+
+    serve.app.state.elasticity = None
+    assert client.post("/predict_price", json=request).status_code == 503
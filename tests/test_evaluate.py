@@ -0,0 +1,49 @@
+import sys
+import numpy as np
+import pytest
+from src.utils.synthetic import synthetic_retail_data
+from src.api.inference import load_policy
+from src.model import evaluate
+from src.model.evaluate import evaluate_policies, passes_gate, simulate
+from src.model.product_table import ProductTable
+from src.model.vec_env import VecRetailPricingEnv
+
+POLICY = "models/ppo_policy.npz"
+
+def test_simulate_matches_env_episode():
+    dataset = synthetic_retail_data(1, seed=3)
+    table = ProductTable.from_dataframe(dataset)
+    policy = load_policy(POLICY)
+    profit, _ = simulate(policy, table.matrix, max_steps=20)
+
+    env = VecRetailPricingEnv(env_config={"product_table": table, "max_steps": 20}, num_envs=1)
+    obs, total = env.reset(), 0.0
+    for _ in range(20):
+        actions, _ = policy.predict(obs, deterministic=True)
+        obs, rewards, dones, _ = env.step(actions)
+        total += float(rewards[0])
+    np.testing.assert_allclose(profit[0], total, rtol=1e-5)
+
+def test_parallel_report_matches_serial():
+    dataset = synthetic_retail_data(2000, seed=4)
+    policies = {"rl": POLICY, "hold": 0.0, "plus_10": 0.1}
+    serial = evaluate_policies(dataset, policies, n_workers=1, max_steps=10)
+    parallel = evaluate_policies(dataset, policies, n_workers=2, chunk_size=300, max_steps=10)
+
+    assert serial["products"] == dataset["product_id"].nunique()
+    for name in policies:
+        np.testing.assert_allclose(parallel["policies"][name]["total_profit"], serial["policies"][name]["total_profit"])
+    assert serial["policies"]["hold"]["mean_price_drift"] == 0.0
+    np.testing.assert_allclose(serial["policies"]["plus_10"]["mean_price_drift"], 1.1 ** 10 - 1, rtol=1e-6)
+    categories = serial["policies"]["rl"]["categories"]
+    assert sum(row["products"] for row in categories.values()) == serial["products"]
+
+def test_unknown_gate_baseline_is_reported(monkeypatch, capsys):
+    with pytest.raises(ValueError, match="plus_10"):
+        passes_gate({"policies": {"rl": {"total_profit": 1.0}, "plus_10": {"total_profit": 0.5}}}, "rl", "hodl")
+
+    monkeypatch.setattr(sys, "argv", ["evaluate.py", "--gate", "hodl"])
+    with pytest.raises(SystemExit) as exit_info:
+        evaluate.main()
+    assert exit_info.value.code == 2
+    assert "'hodl' is not an evaluated policy" in capsys.readouterr().err
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from src.preprocessing.features import compute_features, featurize_columns, feature_matrix, build_observation
+
+row = {
+    "unit_price": 100.0,
+    "comp_1": 95.0,
+    "comp_2": 97.0,
+    "comp_3": 93.0,
+    "qty": 50,
+    "lag_price": 98.0,
+    "product_score": 4.5
+}
+
+def test_row_and_column_paths_match():
+    single = compute_features(**row)
+    assert single == {
+        "price_gap": 5.0,
+        "normalized_price": 0.1,
+        "demand_signal": 0.05,
+        "price_trend": 2.0,
+        "product_score": 4.5
+    }
+
+    frame = pd.DataFrame([row, row])
+    batch = featurize_columns(frame)
+    assert np.array_equal(feature_matrix(batch)[1], build_observation(single))
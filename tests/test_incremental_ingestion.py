@@ -0,0 +1,74 @@
+import pandas as pd
+import yaml
+from src.ingestion.incremental import ingest_incremental, read_changed_partitions, read_partitions
+from src.model.pricing_model import load_dataset
+
+selected_columns = ["product_id", "product_category_name", "month_year", "year", "unit_price", "qty"]
+
+def test_incremental_upsert_touches_only_new_partitions(tmp_path):
+    data = pd.read_csv("data/retail_data.csv", usecols=selected_columns + ["month"])
+    period = data["year"] * 100 + data["month"]
+    data = data.drop(columns="month")
+    output_path = str(tmp_path / "retail")
+
+    data[period < 201801].to_csv(tmp_path / "2017.csv", index=False)
+    state = ingest_incremental(str(tmp_path / "2017.csv"), output_path, selected_columns)
+    assert state["watermark"] == 201712
+
+    # Next file adds 2018 and restates December 2017 for one category
+    restated = (period == 201712) & (data["product_category_name"] == "bed_bath_table")
+    update = data.copy()
+    update.loc[restated, "unit_price"] = 1.0
+    update = update[(period >= 201801) | restated]
+    update.to_csv(tmp_path / "2018.csv", index=False)
+    state = ingest_incremental(str(tmp_path / "2018.csv"), output_path, selected_columns)
+    assert state["watermark"] == period.max()
+
+    table = read_partitions(output_path)
+    assert len(table) == len(data)
+    assert not table.duplicated(["product_id", "month_year"]).any()
+    december = table[table["month_year"].str.endswith("12-2017")]
+    assert (december["unit_price"] == 1.0).sum() == restated.sum()
+
+    changed = read_changed_partitions(output_path)
+    assert set(changed[changed["year"] == 2017]["product_category_name"]) == {"bed_bath_table"}
+    assert {tuple(p) for p in state["changed_partitions"]} == set(zip(changed["product_category_name"], changed["year"]))
+
+def test_unchanged_rows_leave_partitions_untouched(tmp_path):
+    data = pd.read_csv("data/retail_data.csv", usecols=selected_columns)
+    data.to_csv(tmp_path / "retail.csv", index=False)
+    output_path = str(tmp_path / "retail")
+    # Small blocks so partitions are staged across many batches
+    first = ingest_incremental(str(tmp_path / "retail.csv"), output_path, selected_columns, block_size=4096)
+    assert len(first["changed_partitions"]) == data.groupby(["product_category_name", "year"]).ngroups
+    assert len(read_partitions(output_path)) == len(data)
+
+    part_files = sorted((tmp_path / "retail").glob("*/*/part-0.parquet"))
+    mtimes = [path.stat().st_mtime_ns for path in part_files]
+    # The watermark month is read again, but its rows are identical
+    state = ingest_incremental(str(tmp_path / "retail.csv"), output_path, selected_columns, block_size=4096)
+    assert state["changed_partitions"] == [] and state["watermark"] == first["watermark"]
+    assert [path.stat().st_mtime_ns for path in part_files] == mtimes
+    assert read_changed_partitions(output_path).empty
+
+def test_load_dataset_reads_changed_partitions(tmp_path):
+    data = pd.read_csv("data/retail_data.csv", usecols=selected_columns)
+    data.to_csv(tmp_path / "retail.csv", index=False)
+    output_path = str(tmp_path / "retail")
+    ingest_incremental(str(tmp_path / "retail.csv"), output_path, selected_columns)
+    month = pd.to_datetime(data["month_year"], format="%d-%m-%Y")
+    latest = (month == month.max()) & (data["product_category_name"] == "bed_bath_table")
+    restated = data[latest].assign(unit_price=1.0)
+    restated.to_csv(tmp_path / "restated.csv", index=False)
+    ingest_incremental(str(tmp_path / "restated.csv"), output_path, selected_columns)
+
+    config_path = tmp_path / "config.yaml"
+    config = yaml.safe_load(open("config/config.example.yaml"))
+    config["data"]["partitioned_path"] = output_path
+    config_path.write_text(yaml.safe_dump(config))
+    assert len(load_dataset(str(config_path), columns=["product_id", "unit_price"])) == len(data)
+    changed = load_dataset(str(config_path), columns=["product_id", "unit_price"], changed_only=True)
+    # The whole bed_bath_table partition of that year, with the restated rows updated
+    assert (changed["unit_price"] == 1.0).sum() == len(restated) > 0
+    partition = (data["product_category_name"] == "bed_bath_table") & (month.dt.year == month.max().year)
+    assert len(changed) == partition.sum()
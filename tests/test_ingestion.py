@@ -0,0 +1,14 @@
+import pandas as pd
+from src.ingestion.local_ingestion import ingest_local
+
+selected_columns = ["product_id", "product_category_name", "month_year", "qty", "unit_price", "comp_1", "lag_price"]
+
+def test_local_ingestion_streams_all_rows(tmp_path):
+    output_path = str(tmp_path / "retail")
+    rows = ingest_local("data/retail_data.csv", output_path, selected_columns, block_size=4096)
+
+    expected = pd.read_csv("data/retail_data.csv", usecols=selected_columns)[selected_columns]
+    written = pd.read_parquet(output_path)
+    assert rows == len(expected) == len(written)
+    assert list(written.columns) == selected_columns
+    assert written["unit_price"].tolist() == expected["unit_price"].tolist()
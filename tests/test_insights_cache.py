@@ -0,0 +1,43 @@
+import asyncio
+from src.genai.cache import InsightsCache
+
+features = {"product_category_name": "Electronics", "price_gap": 5.1, "demand_signal": 0.052, "product_score": 4.4}
+
+def test_cache_quantized_key_and_eviction():
+    cache = InsightsCache(max_entries=1)
+    key = cache.make_key(features)
+    assert key == cache.make_key(dict(features, price_gap=5.4))
+
+    cache.set(key, "insight")
+    assert cache.get(key) == "insight"
+    cache.set("other", "insight 2")
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "insights.db")
+    cache = InsightsCache(path=path)
+    cache.set(cache.make_key(features), "insight")
+    assert InsightsCache(path=path).get(cache.make_key(features)) == "insight"
+
+def test_cache_key_keeps_pricing_direction_and_namespace():
+    cache = InsightsCache()
+    assert cache.make_key(dict(features, price_gap=1.0)) != cache.make_key(dict(features, price_gap=-1.0))
+    assert cache.make_key(dict(features, price_gap=0.0)) != cache.make_key(dict(features, price_gap=0.5))
+    assert InsightsCache(namespace="openai:gpt-4").make_key(features) != InsightsCache(namespace="local:gpt2").make_key(features)
+
+def test_disk_store_is_pruned_on_write(tmp_path):
+    path = str(tmp_path / "insights.db")
+    cache = InsightsCache(path=path, max_disk_entries=2)
+    for i in range(4):
+        cache.set(f"key {i}", f"insight {i}")
+    expired = InsightsCache(path=path, ttl_seconds=-1.0)
+    expired.set("stale", "insight")
+    rows = [row[0] for row in cache._db.execute("SELECT key FROM insights ORDER BY key")]
+    assert rows == ["key 2", "key 3"]
+
+    # Disk reads and writes run off the event loop
+    async def main():
+        await cache.set_async("key 4", "insight 4")
+        return await InsightsCache(path=path).get_async("key 4")
+    assert asyncio.run(main()) == "insight 4"
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from src.genai.gateway import InsightsGateway, UpstreamOverloaded
+
+def test_single_flight_and_backpressure():
+    gateway = InsightsGateway(max_concurrency=1, max_queue=1, timeout_seconds=1.0)
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "insight"
+
+    async def main():
+        shared = await asyncio.gather(*[gateway.call("same prompt", slow_call) for _ in range(3)])
+        assert shared == ["insight"] * 3 and len(calls) == 1
+
+        results = await asyncio.gather(
+            *[gateway.call(f"prompt {i}", slow_call) for i in range(3)], return_exceptions=True
+        )
+        assert isinstance(results[2], UpstreamOverloaded)
+
+    asyncio.run(main())
+
+def test_timeout():
+    gateway = InsightsGateway(timeout_seconds=0.01)
+
+    async def hung_call():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(gateway.call("prompt", hung_call))
+
+def test_leader_disconnect_keeps_shared_call_for_followers():
+    from openai import AsyncOpenAI
+    from benchmarks.stub_openai import STUB_INSIGHTS, StubOpenAIServer
+
+    with StubOpenAIServer(latency_s=0.2) as server:
+        client = AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0)
+        gateway = InsightsGateway(timeout_seconds=5.0)
+
+        async def upstream():
+            response = await client.chat.completions.create(
+                model="gpt-4", messages=[{"role": "user", "content": "prompt"}]
+            )
+            return response.choices[0].message.content
+
+        async def main():
+            leader = asyncio.ensure_future(gateway.call("prompt", upstream))
+            await asyncio.sleep(0.01)
+            followers = [asyncio.ensure_future(gateway.call("prompt", upstream)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            # The first caller's client disconnects mid-call
+            leader.cancel()
+            assert await asyncio.gather(*followers) == [STUB_INSIGHTS] * 2
+            assert leader.cancelled()
+
+            # Once every caller has gone, the upstream call is cancelled
+            abandoned = [asyncio.ensure_future(gateway.call("other prompt", upstream)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            inflight = gateway._inflight["other prompt"]
+            for waiter in abandoned:
+                waiter.cancel()
+            await asyncio.gather(*abandoned, return_exceptions=True)
+            await asyncio.gather(inflight.task, return_exceptions=True)
+            assert inflight.task.cancelled() and gateway._inflight == {}
+            await client.close()
+
+        asyncio.run(main())
+        assert server.app.state.calls == 2
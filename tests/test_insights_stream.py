@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+from src.api import serve
+from src.api.inference import PolicyBatcher
+from src.genai import insights
+from src.genai.cache import InsightsCache
+from src.genai.gateway import InsightsGateway
+
+REQUEST = {
+    "product_id": "123", "unit_price": 100.0, "comp_1": 95.0, "comp_2": 97.0, "comp_3": 93.0, "qty": 50,
+    "product_category_name": "Electronics", "product_score": 4.5, "volume": 100.0, "lag_price": 98.0
+}
+
+def _events(body: str) -> list:
+    events = []
+    for raw in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in raw.split("\n"))
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+def test_stream_endpoint_sends_text_then_done(monkeypatch):
+    async def fake_stream(features, config_path):
+        for text in ["Demand ", "is ", "steady."]:
+            yield text
+
+    monkeypatch.setattr(serve, "generate_insights_stream", fake_stream)
+    response = TestClient(serve.app).post("/generate_insights/stream", json=REQUEST)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert "".join(data["text"] for event, data in events if event == "message") == "Demand is steady."
+    assert events[-1] == ("done", {"product_id": "123"})
+
+class ConstantPolicy:
+    def predict(self, observations, deterministic=True):
+        return np.full((len(observations), 1), 0.05, dtype=np.float32), None
+
+def test_price_insights_stream_featurizes_once(monkeypatch):
+    calls, preprocess = [], serve.preprocess
+
+    async def counting_preprocess(request):
+        calls.append(request.product_id)
+        return await preprocess(request)
+
+    async def fake_stream(features, config_path):
+        assert features["price_gap"] == 5.0
+        yield "Competitive."
+
+    monkeypatch.setattr(serve, "preprocess", counting_preprocess)
+    monkeypatch.setattr(serve, "generate_insights_stream", fake_stream)
+    serve.app.state.policy = PolicyBatcher(ConstantPolicy())
+    response = TestClient(serve.app).post("/price_insights/stream", json=REQUEST)
+    events = _events(response.text)
+    assert events[0][0] == "price" and abs(events[0][1]["recommended_price"] - 105.0) < 1e-4
+    assert events[1:] == [("message", {"text": "Competitive."}), ("done", {"product_id": "123"})]
+    assert calls == ["123"]
+
+class FakeUpstream:
+    """Chat completion stream that records whether it was closed."""
+    def __init__(self):
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0.01)
+        return type("Chunk", (), {"choices": [type("Choice", (), {"delta": type("Delta", (), {"content": "tok "})})]})
+
+    async def close(self):
+        self.closed = True
+
+def test_closing_the_stream_closes_upstream(monkeypatch):
+    upstream = FakeUpstream()
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            assert kwargs["stream"]
+            return upstream
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": FakeCompletions()})})
+    monkeypatch.setattr(insights, "get_async_client", lambda config_path: client)
+    monkeypatch.setattr(insights, "get_insights_cache", lambda config_path: InsightsCache(max_entries=0))
+    monkeypatch.setattr(insights, "get_insights_gateway", lambda config_path: InsightsGateway())
+
+    async def main():
+        features = {"product_id": "1", "product_category_name": "toys", "price_gap": 1.0,
+                    "demand_signal": 0.1, "product_score": 4.0}
+        chunks = insights.generate_insights_stream(features, "config/config.yaml")
+        assert await chunks.__anext__() == "tok "
+        # Client disconnect: the endpoint closes the generator
+        await chunks.aclose()
+
+    asyncio.run(main())
+    assert upstream.closed
+
+class SlowLocalModel:
+    """Local stream whose steps span several tokens; records whether decoding is still running."""
+    def __init__(self):
+        self.active = False
+        self.stopped = False
+
+    def stream(self, prompt, stop=None):
+        while True:
+            self.active = True
+            for _ in range(10):
+                time.sleep(0.01)
+                if stop is not None and stop.is_set():
+                    self.active, self.stopped = False, True
+                    return
+            self.active = False
+            yield "tok "
+
+def _use_local(monkeypatch, model, gateway):
+    monkeypatch.setattr(insights, "use_local_backend", lambda config_path: True)
+    monkeypatch.setattr(insights, "get_local_backend", lambda config_path: type("Backend", (), {"model": model}))
+    monkeypatch.setattr(insights, "get_insights_cache", lambda config_path: InsightsCache(max_entries=0))
+    monkeypatch.setattr(insights, "get_insights_gateway", lambda config_path: gateway)
+
+FEATURES = {"product_id": "1", "product_category_name": "toys", "price_gap": 1.0,
+            "demand_signal": 0.1, "product_score": 4.0}
+
+def test_cancelling_local_stream_stops_decoding_before_release(monkeypatch):
+    model, gateway = SlowLocalModel(), InsightsGateway(max_concurrency=1)
+    _use_local(monkeypatch, model, gateway)
+
+    async def main():
+        chunks = insights.generate_insights_stream(FEATURES, "config/config.yaml")
+        assert await chunks.__anext__() == "tok "
+        # Client disconnect while a step is decoding in the worker thread
+        pending = asyncio.ensure_future(chunks.__anext__())
+        await asyncio.sleep(0.03)
+        pending.cancel()
+        try:
+            await pending
+        except asyncio.CancelledError:
+            pass
+        await chunks.aclose()
+        assert model.stopped and not model.active
+        # The slot is free again only once decoding has stopped
+        assert not gateway._semaphore.locked()
+
+    asyncio.run(main())
+
+def test_idle_timeout_on_local_stream_stops_decoding(monkeypatch):
+    model = SlowLocalModel()
+    _use_local(monkeypatch, model, InsightsGateway(timeout_seconds=0.03))
+
+    async def main():
+        chunks = insights.generate_insights_stream(FEATURES, "config/config.yaml")
+        try:
+            async for _ in chunks:
+                pass
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("expected a timeout")
+        assert model.stopped and not model.active
+
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import asyncio
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+from transformers import DynamicCache, GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+from transformers.pytorch_utils import Conv1D
+from src.genai.insights import PROMPT_PREFIX, SYSTEM_PROMPT, build_prompt
+from src.genai.local_backend import LocalInsightsBatcher, LocalInsightsModel
+
+def _tiny_model():
+    """Offline byte-level BPE tokenizer and a randomly initialized 2-layer GPT-2."""
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=320, special_tokens=["<|endoftext|>"],
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    tokenizer.train_from_iterator([SYSTEM_PROMPT, PROMPT_PREFIX, "category price demand score"], trainer)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<|endoftext|>")
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=512, n_embd=32, n_layer=2, n_head=2,
+                        bos_token_id=tokenizer.eos_token_id, eos_token_id=tokenizer.eos_token_id)
+    return GPT2LMHeadModel(config).eval(), tokenizer
+
+def _prompt(category: str, price_gap: float) -> str:
+    return build_prompt({"product_category_name": category, "price_gap": price_gap,
+                         "demand_signal": 0.05, "product_score": 4.5})
+
+def _reference(model, tokenizer, prompt: str, max_new_tokens: int) -> str:
+    """Greedy decoding over the full text without any cache."""
+    ids = tokenizer.encode(f"{SYSTEM_PROMPT}\n\nUser: {PROMPT_PREFIX}", add_special_tokens=False)
+    ids += tokenizer.encode(f"{prompt[len(PROMPT_PREFIX):]}\nAnalyst:", add_special_tokens=False)
+    generated = []
+    with torch.inference_mode():
+        for _ in range(max_new_tokens):
+            token = int(model(torch.tensor([ids + generated])).logits[0, -1].argmax())
+            if token == tokenizer.eos_token_id:
+                break
+            generated.append(token)
+    return tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+def test_prefix_cache_and_batching_match_plain_decoding():
+    model, tokenizer = _tiny_model()
+    local = LocalInsightsModel(model, tokenizer, SYSTEM_PROMPT, PROMPT_PREFIX, max_new_tokens=8, quantize=False)
+    # Different suffix lengths exercise the padding between prefix and suffix
+    prompts = [_prompt("toys", 3.0), _prompt("bed_bath_table", -120.25)]
+    expected = [_reference(model, tokenizer, prompt, 8) for prompt in prompts]
+    assert all(expected) and local.generate(prompts) == expected
+
+def test_quantized_backend_batches_concurrent_requests():
+    model, tokenizer = _tiny_model()
+    local = LocalInsightsModel(model, tokenizer, SYSTEM_PROMPT, PROMPT_PREFIX, max_new_tokens=4)
+    # Conv1D projections and the LM head all run as dynamic int8 linears
+    assert not any(type(module) in (torch.nn.Linear, Conv1D) for module in local.model.modules())
+
+    batches = []
+    generate = local.generate
+    local.generate = lambda prompts: batches.append(len(prompts)) or generate(prompts)
+    batcher = LocalInsightsBatcher(local, max_batch_size=8, batch_window_ms=50)
+
+    async def main():
+        results = await asyncio.gather(*[batcher.generate(_prompt("toys", gap)) for gap in range(3)])
+        await batcher.close()
+        return results
+
+    results = asyncio.run(main())
+    assert len(results) == 3 and all(isinstance(text, str) for text in results)
+    assert batches == [3]
+
+def test_stream_matches_generate():
+    model, tokenizer = _tiny_model()
+    local = LocalInsightsModel(model, tokenizer, SYSTEM_PROMPT, PROMPT_PREFIX, max_new_tokens=6, quantize=False)
+    prompt = _prompt("toys", 3.0)
+    assert "".join(local.stream(prompt)).strip() == local.generate([prompt])[0]
+
+class LegacyCacheModel(torch.nn.Module):
+    """Wraps a model so it takes and returns tuple caches, as transformers<4.47 does."""
+    def __init__(self, model):
+        super().__init__()
+        self.inner = model
+
+    def forward(self, input_ids, past_key_values=None, **kwargs):
+        if isinstance(past_key_values, tuple):
+            cache = DynamicCache()
+            for layer, (keys, values) in enumerate(past_key_values):
+                cache.update(keys, values, layer)
+            past_key_values = cache
+        output = self.inner(input_ids, past_key_values=past_key_values, **kwargs)
+        output.past_key_values = tuple((layer.keys, layer.values) for layer in output.past_key_values.layers)
+        return output
+
+def test_legacy_tuple_cache_matches_plain_decoding():
+    model, tokenizer = _tiny_model()
+    local = LocalInsightsModel(LegacyCacheModel(model), tokenizer, SYSTEM_PROMPT, PROMPT_PREFIX,
+                               max_new_tokens=8, quantize=False)
+    assert local.legacy_cache
+    prompts = [_prompt("toys", 3.0), _prompt("bed_bath_table", -120.25)]
+    assert local.generate(prompts) == [_reference(model, tokenizer, prompt, 8) for prompt in prompts]
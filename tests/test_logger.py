@@ -0,0 +1,6 @@
+from src.utils.logger import setup_logger
+
+def test_logger_configured_once():
+    logger = setup_logger("config/config.yaml")
+    assert setup_logger("config/config.yaml") is logger
+    assert len(logger.handlers) == 1
@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from src.preprocessing.preprocess import app
+
+client = TestClient(app)
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_stage_latency_and_error_metrics():
+    features_before = _sample("pricing_stage_latency_seconds_count", stage="features")
+    validation_before = _sample("pricing_stage_latency_seconds_count", stage="validation")
+    errors_before = _sample("pricing_request_errors_total", endpoint="/preprocess", status="422")
+
+    response = client.post("/preprocess", json={
+        "product_id": "123", "unit_price": 100.0, "comp_1": 95.0, "comp_2": 97.0, "comp_3": 93.0, "qty": 50,
+        "product_category_name": "Electronics", "product_score": 4.5, "volume": 100.0, "lag_price": 98.0
+    })
+    assert response.status_code == 200
+    assert client.post("/preprocess", json={"product_id": "123"}).status_code == 422
+
+    assert _sample("pricing_stage_latency_seconds_count", stage="features") == features_before + 1
+    assert _sample("pricing_stage_latency_seconds_count", stage="validation") == validation_before + 1
+    assert _sample("pricing_request_errors_total", endpoint="/preprocess", status="422") == errors_before + 1
+    assert _sample("pricing_requests_in_flight", endpoint="/preprocess") == 0
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert "insights_cache_hit_ratio" in metrics.text
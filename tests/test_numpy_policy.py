@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from stable_baselines3 import PPO
+from src.api.inference import load_policy
+from src.model.numpy_policy import NumpyPolicy, export_policy
+from src.model.vec_env import VecRetailPricingEnv
+
+dataset = pd.DataFrame({
+    "unit_price": [100.0, 45.95], "comp_1": [95.0, 89.9], "comp_2": [97.0, 215.0], "comp_3": [93.0, 45.95],
+    "qty": [50, 3], "lag_price": [98.0, 45.9], "product_score": [4.5, 4.0]
+})
+
+def test_numpy_policy_matches_sb3(tmp_path):
+    env = VecRetailPricingEnv(env_config={"dataset": dataset}, num_envs=2)
+    for policy_kwargs in (None, {"net_arch": [16, 8], "activation_fn": torch.nn.ReLU}):
+        model = PPO("MlpPolicy", env, policy_kwargs=policy_kwargs, seed=0, device="cpu")
+        # Push actions past the bounds so clipping is exercised too
+        with torch.no_grad():
+            model.policy.action_net.bias.fill_(0.08)
+        path = export_policy(model, str(tmp_path / "policy.npz"))
+        policy = load_policy(path)
+        assert isinstance(policy, NumpyPolicy)
+
+        observations = np.random.default_rng(0).normal(size=(256, 5)).astype(np.float32)
+        expected, _ = model.predict(observations, deterministic=True)
+        actions, _ = policy.predict(observations)
+        assert actions.shape == (256, 1)
+        np.testing.assert_allclose(actions, expected, atol=1e-6)
+
+        single, _ = policy.predict(observations[0])
+        np.testing.assert_allclose(single, expected[0], atol=1e-6)
+
+def test_export_rejects_unsupported_activation(tmp_path):
+    env = VecRetailPricingEnv(env_config={"dataset": dataset}, num_envs=2)
+    model = PPO("MlpPolicy", env, policy_kwargs={"activation_fn": torch.nn.ELU}, seed=0, device="cpu")
+    with pytest.raises(ValueError, match="ELU"):
+        export_policy(model, str(tmp_path / "policy.npz"))
+    assert not (tmp_path / "policy.npz").exists()
@@ -0,0 +1,62 @@
+import asyncio
+import numpy as np
+import pytest
+from src.api.inference import PolicyBatcher
+
+class CountingPolicy:
+    """Returns each observation's first feature as its action and records every forward pass."""
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def predict(self, observations, deterministic=True):
+        self.batches.append(len(observations))
+        if self.fail:
+            raise RuntimeError("policy failed")
+        return observations[:, :1].copy(), None
+
+def observation(value: float) -> np.ndarray:
+    return np.array([value, 0.1, 0.2, 0.3, 0.4], dtype=np.float32)
+
+def test_concurrent_predictions_share_one_forward_pass():
+    policy = CountingPolicy()
+    batcher = PolicyBatcher(policy, max_batch_size=64, batch_window_ms=20.0)
+
+    async def main():
+        results = await asyncio.gather(*[batcher.predict(observation(i / 10)) for i in range(10)])
+        await batcher.close()
+        return results
+
+    results = asyncio.run(main())
+    assert policy.batches == [10]
+    # Each caller gets the action for its own observation
+    np.testing.assert_allclose(results, [i / 10 for i in range(10)], rtol=1e-6)
+
+def test_batches_are_capped_at_max_batch_size():
+    policy = CountingPolicy()
+    batcher = PolicyBatcher(policy, max_batch_size=4, batch_window_ms=20.0)
+
+    async def main():
+        results = await asyncio.gather(*[batcher.predict(observation(i)) for i in range(10)])
+        await batcher.close()
+        return results
+
+    assert asyncio.run(main()) == list(range(10))
+    assert policy.batches == [4, 4, 2]
+
+def test_batch_failure_reaches_every_caller():
+    policy = CountingPolicy(fail=True)
+    batcher = PolicyBatcher(policy, batch_window_ms=20.0)
+
+    async def main():
+        results = await asyncio.gather(*[batcher.predict(observation(i)) for i in range(3)], return_exceptions=True)
+        # The worker keeps serving after a failed batch
+        policy.fail = False
+        after = await batcher.predict(observation(7))
+        await batcher.close()
+        return results, after
+
+    results, after = asyncio.run(main())
+    assert policy.batches == [3, 1]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert after == pytest.approx(7)
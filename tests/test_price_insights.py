@@ -0,0 +1,48 @@
+import json
+import numpy as np
+from fastapi.testclient import TestClient
+from src.api import serve
+from src.api.inference import PolicyBatcher
+from src.genai.gateway import UpstreamOverloaded
+
+REQUEST = {
+    "product_id": "123", "unit_price": 100.0, "comp_1": 95.0, "comp_2": 97.0, "comp_3": 93.0, "qty": 50,
+    "product_category_name": "Electronics", "product_score": 4.5, "volume": 100.0, "lag_price": 98.0
+}
+
+class ConstantPolicy:
+    def predict(self, observations, deterministic=True):
+        return np.full((len(observations), 1), 0.05, dtype=np.float32), None
+
+def _post(monkeypatch, fake_stream):
+    monkeypatch.setattr(serve, "generate_insights_stream", fake_stream)
+    serve.app.state.policy = PolicyBatcher(ConstantPolicy())
+    response = TestClient(serve.app).post("/price_insights/stream", json=REQUEST)
+    assert response.status_code == 200
+    events = []
+    for raw in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in raw.split("\n"))
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+def test_price_then_insights(monkeypatch):
+    featurized = []
+
+    async def fake_stream(features, config_path):
+        featurized.append(features)
+        yield "Prices are competitive."
+
+    (event, price), *insights = _post(monkeypatch, fake_stream)
+    assert event == "price" and abs(price["recommended_price"] - 105.0) < 1e-4
+    assert insights == [("message", {"text": "Prices are competitive."}), ("done", {"product_id": "123"})]
+    # Insights see the same features the price was computed from
+    assert featurized == [price["features"]]
+
+def test_insights_failure_keeps_price(monkeypatch):
+    async def overloaded(features, config_path):
+        raise UpstreamOverloaded("queue full")
+        yield
+
+    (event, _), (error_event, error) = _post(monkeypatch, overloaded)
+    assert event == "price"
+    assert error_event == "error" and error["status"] == 503
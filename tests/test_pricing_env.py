@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from src.model.product_table import ProductTable
+from src.model.vec_env import VecRetailPricingEnv
+from src.model.parallel_env import SharedMemVecEnv
+
+dataset = pd.DataFrame({
+    "unit_price": [100.0, 45.95, 250.0],
+    "comp_1": [95.0, 89.9, 240.0],
+    "comp_2": [97.0, 215.0, 260.0],
+    "comp_3": [93.0, 45.95, 255.0],
+    "qty": [50, 3, 12],
+    "lag_price": [98.0, 45.9, 245.0],
+    "product_score": [4.5, 4.0, 3.9]
+})
+
+def test_vec_env_step():
+    env = VecRetailPricingEnv(env_config={"dataset": dataset, "max_steps": 2}, num_envs=4)
+    env.seed(0)
+    obs = env.reset()
+    assert obs.shape == (4, 5) and obs.dtype == np.float32
+
+    obs, rewards, dones, infos = env.step(np.full((4, 1), 0.1, dtype=np.float32))
+    assert rewards.shape == (4,) and not dones.any()
+    assert np.all(rewards > 0)
+
+    obs, rewards, dones, infos = env.step(np.zeros((4, 1), dtype=np.float32))
+    assert dones.all()
+    assert all("terminal_observation" in info for info in infos)
+
+def test_product_table_projection():
+    table = ProductTable.from_dataframe(dataset.assign(unused="x"))
+    assert table.matrix.shape == (3, 7) and table.matrix.dtype == np.float32
+    assert np.allclose(table.matrix[0, 2:], [5.0, 0.1, 0.05, 2.0, 4.5])
+
+    rows_a = table.sample(np.random.default_rng(42), size=5)
+    rows_b = table.sample(np.random.default_rng(42), size=5)
+    assert np.array_equal(rows_a, rows_b)
+
+def test_shared_memory_vec_env():
+    env = SharedMemVecEnv(env_config={"dataset": dataset, "max_steps": 2}, num_envs=5, n_workers=2)
+    try:
+        env.seed(0)
+        first = env.reset()
+        env.seed(0)
+        assert np.array_equal(env.reset(), first)
+
+        env.step(np.zeros((5, 1), dtype=np.float32))
+        obs, rewards, dones, infos = env.step(np.zeros((5, 1), dtype=np.float32))
+        assert obs.shape == (5, 5) and rewards.shape == (5,)
+        assert dones.all() and all("terminal_observation" in info for info in infos)
+    finally:
+        env.close()
+
+def test_shared_memory_vec_env_forwards_set_attr_and_env_method():
+    env = SharedMemVecEnv(env_config={"dataset": dataset, "max_steps": 3}, num_envs=5, n_workers=2)
+    try:
+        env.seed(0)
+        env.reset()
+        # Only the worker hosting env 4 (envs 3 and 4) shortens its episodes
+        env.set_attr("max_steps", 1, indices=[4])
+        assert env.get_attr("max_steps") == [3, 3, 3, 1, 1]
+        _, _, dones, _ = env.step(np.zeros((5, 1), dtype=np.float32))
+        assert dones.tolist() == [False, False, False, True, True]
+
+        # Each call runs on the worker's env, which answers for all of its envs
+        assert env.env_method("get_attr", "max_steps", indices=[4, 0]) == [[1, 1], [3, 3, 3]]
+        env.set_attr("max_steps", 2)
+        assert env.env_method("get_attr", "max_steps") == [[2, 2, 2]] * 3 + [[2, 2]] * 2
+    finally:
+        env.close()
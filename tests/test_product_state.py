@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import serve
+from src.api.inference import PolicyBatcher
+from src.api.product_state import ProductStateStore, build_snapshot
+
+def _history(price_b: float) -> pd.DataFrame:
+    return pd.DataFrame({
+        "product_id": ["b", "a", "a"],
+        "product_category_name": ["toys", "garden_tools", "garden_tools"],
+        "month_year": ["01-05-2018", "01-03-2018", "01-01-2018"],
+        "unit_price": [price_b, 110.0, 90.0],
+        "comp_1": [20.0, 95.0, 85.0], "comp_2": [21.0, 97.0, 86.0], "comp_3": [22.0, 93.0, 87.0],
+        "qty": [7, 50, 40], "product_score": [4.0, 4.5, 4.5], "volume": [10.0, 100.0, 100.0],
+        "lag_price": [19.0, 98.0, 88.0]
+    })
+
+def test_snapshot_keeps_latest_row_and_reloads_atomically(tmp_path):
+    path = str(tmp_path / "product_state")
+    assert build_snapshot(_history(25.0), path) == 2
+    store = ProductStateStore(path)
+    store.reload()
+    old_index = store.index
+    assert store.lookup("a")["unit_price"] == 110.0 and store.lookup("a")["qty"] == 50
+    assert store.lookup("b")["product_category_name"] == "toys"
+    assert store.lookup("c") is None
+
+    build_snapshot(_history(30.0), path)
+    store.reload()
+    assert store.lookup("b")["unit_price"] == 30.0
+    # Requests still holding the previous index keep reading its mapping
+    assert old_index.lookup("b")["unit_price"] == 25.0
+
+class ConstantPolicy:
+    def predict(self, observations, deterministic=True):
+        return np.zeros((len(observations), 1), dtype=np.float32), None
+
+def test_api_fills_omitted_fields_from_state(tmp_path):
+    path = str(tmp_path / "product_state")
+    build_snapshot(_history(25.0), path)
+    serve.app.state.product_state = ProductStateStore(path)
+    serve.app.state.product_state.reload()
+    serve.app.state.policy = PolicyBatcher(ConstantPolicy())
+    client = TestClient(serve.app)
+
+    response = client.post("/predict_price", json={"product_id": "a", "unit_price": 120.0})
+    assert response.status_code == 200
+    features = response.json()["features"]
+    assert features["price_gap"] == 120.0 - 95.0 and features["product_category_name"] == "garden_tools"
+
+    assert client.post("/predict_price", json={"product_id": "unknown"}).status_code == 404
+
+def test_reload_during_rebuilds_sees_whole_snapshots(tmp_path):
+    path = str(tmp_path / "product_state")
+    build_snapshot(_history(25.0), path)
+    extra = pd.concat([_history(30.0), _history(30.0).assign(product_id="c")])
+    errors, stop = [], threading.Event()
+
+    def rebuild():
+        for i in range(30):
+            build_snapshot(extra if i % 2 else _history(25.0), path)
+        stop.set()
+
+    writer = threading.Thread(target=rebuild)
+    writer.start()
+    store = ProductStateStore(path)
+    while not stop.is_set():
+        try:
+            store.reload()
+            index = store.index
+            # Arrays of one index always come from the same build
+            assert len(index.product_ids) == len(index.values) == len(index.category_codes)
+            assert index.lookup("b")["unit_price"] == (30.0 if len(index) == 3 else 25.0)
+        except Exception as e:
+            errors.append(e)
+    writer.join()
+    assert errors == []
@@ -0,0 +1,47 @@
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from src.utils.synthetic import synthetic_retail_data
+from src.api.inference import load_policy
+from src.model.reprice import reprice_catalog
+from src.preprocessing.features import featurize_columns, feature_matrix
+
+CONFIG = {"model": {"path": "models/ppo_policy.npz"}}
+
+def test_reprice_is_complete_and_resumable(tmp_path):
+    dataset = synthetic_retail_data(3000, seed=1)
+    input_path = str(tmp_path / "processed.parquet")
+    pq.write_table(pa.Table.from_pandas(dataset, preserve_index=False), input_path, row_group_size=1000)
+    output_path = str(tmp_path / "recommendations")
+
+    summary = reprice_catalog(input_path, output_path, CONFIG, n_workers=2, batch_size=400)
+    assert summary["chunks"] == 3 and summary["rows"] == 3000
+
+    result = pq.read_table(output_path).to_pandas()
+    assert list(result["product_id"]) == list(dataset["product_id"])
+    expected, _ = load_policy("models/ppo_policy.npz").predict(feature_matrix(featurize_columns(dataset)))
+    np.testing.assert_allclose(result["price_adjustment"], expected.reshape(-1), atol=1e-6)
+
+    # A rerun only redoes the missing chunk
+    os.remove(os.path.join(output_path, "part-00001.parquet"))
+    summary = reprice_catalog(input_path, output_path, CONFIG, n_workers=1)
+    assert summary["skipped_chunks"] == 2 and summary["rows"] == 1000
+
+def test_reprice_reads_only_active_delta_files(tmp_path):
+    write_deltalake = pytest.importorskip("deltalake").write_deltalake
+    input_path = str(tmp_path / "delta")
+    dataset = synthetic_retail_data(600, seed=2)
+    write_deltalake(input_path, pa.Table.from_pandas(dataset, preserve_index=False),
+                    partition_by=["product_category_name"])
+    # The overwrite leaves the first version's files in the directory
+    latest = dataset.iloc[:200]
+    write_deltalake(input_path, pa.Table.from_pandas(latest, preserve_index=False),
+                    partition_by=["product_category_name"], mode="overwrite")
+
+    summary = reprice_catalog(input_path, str(tmp_path / "recommendations"), CONFIG, n_workers=1)
+    assert summary["rows"] == 200
+    result = pq.read_table(str(tmp_path / "recommendations")).to_pandas()
+    assert sorted(result["product_id"]) == sorted(latest["product_id"])
+    assert set(result["product_category_name"]) == set(latest["product_category_name"])
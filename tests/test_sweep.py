@@ -0,0 +1,74 @@
+import os
+import time
+import numpy as np
+from stable_baselines3 import PPO
+from src.utils.synthetic import synthetic_retail_data
+from src.model.numpy_policy import NumpyPolicy
+from src.model.product_table import ProductTable
+from src.model import sweep
+from src.model.sweep import eval_sample, promote_best, run_sweep, should_prune, suggest_trials
+
+def test_trials_have_own_seeds_and_stay_in_space():
+    space = {"learning_rate": {"low": 1e-4, "high": 1e-3, "log": True}, "n_epochs": [5, 10]}
+    trials = suggest_trials(space, 5, seed=7)
+    assert len({seed for _, seed, _ in trials}) == 5
+    assert all(1e-4 <= params["learning_rate"] <= 1e-3 and params["n_epochs"] in (5, 10) for _, _, params in trials)
+    assert trials == suggest_trials(space, 5, seed=7)
+
+def test_should_prune_lagging_curve():
+    others = [[[64, 1.0], [128, 2.0]], [[64, 1.5], [128, 3.0]], [[64, 0.5]]]
+    # Only the first two trials reached 128 timesteps
+    assert should_prune(1.0, 128, others)
+    assert not should_prune(2.6, 128, others)
+    assert not should_prune(0.1, 128, others[:1])
+
+def test_sweep_writes_results_and_promotes_best(tmp_path):
+    table = ProductTable.from_dataframe(synthetic_retail_data(200, seed=5))
+    config = {
+        "model": {"n_envs": 2, "ppo": {"gamma": 0.9, "n_epochs": 3}},
+        "sweep": {
+            "n_trials": 3, "seed": 1, "timesteps": 128, "eval_products": 50, "eval_steps": 10,
+            "space": {"learning_rate": {"low": 1e-4, "high": 1e-3, "log": True}, "n_steps": [32], "batch_size": [32],
+                      "n_epochs": [1]}
+        }
+    }
+    output_dir = str(tmp_path / "sweep")
+    results = run_sweep(table, config, output_dir, n_workers=2)
+    assert sorted(results["trial"]) == [0, 1, 2]
+    assert set(results["status"]) <= {"complete", "pruned"} and "complete" in set(results["status"])
+    assert os.path.exists(os.path.join(output_dir, "results.csv"))
+    # Configured PPO settings carry over; swept keys override them
+    trial = PPO.load(os.path.join(output_dir, f"trial_{results.iloc[0]['trial']}", "ppo_model.zip"), device="cpu")
+    assert trial.gamma == 0.9 and trial.n_epochs == 1 and trial.n_envs == 2
+
+    model_path, policy_path = str(tmp_path / "ppo_model.zip"), str(tmp_path / "ppo_policy.npz")
+    eval_matrix = eval_sample(table, config["sweep"])
+    best = promote_best(results, output_dir, eval_matrix, config, model_path=model_path, policy_path=policy_path)
+    assert best == results[results["status"] == "complete"].iloc[0]["trial"]
+    actions, _ = NumpyPolicy.load(policy_path).predict(table.matrix[:4, 2:])
+    assert actions.shape == (4, 1) and np.all(np.abs(actions) <= 0.1)
+
+    # The same model does not beat itself, so production is left alone
+    assert promote_best(results, output_dir, eval_matrix, config, model_path=model_path, policy_path=policy_path) is None
+    # Nor is a trial promoted when it fails the evaluation gate
+    os.remove(model_path)
+    gated = {**config, "evaluation": {"gate_baseline": "plus_10", "min_profit_ratio": 1e6}}
+    assert promote_best(results, output_dir, eval_matrix, gated, model_path=model_path, policy_path=policy_path) is None
+    assert not os.path.exists(model_path)
+
+def crash_second_trial(args):
+    """Stands in for a trial; trial 1 kills its worker process."""
+    if args[0] == 1:
+        os._exit(1)
+    time.sleep(0.2)
+    return {"trial": args[0], "seed": args[1], **args[2], "status": "complete", "timesteps": 0,
+            "final_reward": 0.0, "score": float(args[0]), "seconds": 0.0}
+
+def test_crashed_worker_fails_trials_not_the_sweep(tmp_path, monkeypatch):
+    monkeypatch.setattr(sweep, "_run_trial", crash_second_trial)
+    table = ProductTable.from_dataframe(synthetic_retail_data(50, seed=5))
+    config = {"sweep": {"n_trials": 3, "space": {"n_epochs": [1]}}}
+    results = sweep.run_sweep(table, config, str(tmp_path), n_workers=1, start_method="fork")
+    assert sorted(results["trial"]) == [0, 1, 2]
+    assert results.set_index("trial").loc[1, "status"] == "failed"
+    assert os.path.exists(tmp_path / "results.csv")